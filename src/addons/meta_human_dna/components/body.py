@@ -6,7 +6,6 @@ from mathutils import Vector
 from .. import utilities
 from ..utilities import preserve_context
 from .base import MetaHumanComponentBase
-from ..dna_io import DNAExporter
 from ..constants import (
     BODY_TOPOLOGY_VERTEX_GROUPS_FILE_PATH,
     TOPO_GROUP_PREFIX
@@ -91,23 +90,20 @@ class MetaHumanComponentBody(MetaHumanComponentBase):
             bpy.context.scene.cursor.location = Vector((0, 0, 0)) # type: ignore
             bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
 
-            from_bmesh_object = DNAExporter.get_bmesh(mesh_object=mesh_object, rotation=0)
+            uv_data = utilities.get_vertex_uv_data(mesh_object)
+            vertex_data = utilities.get_vertex_data(mesh_object)
             from_data = {
                 'name': mesh_object.name,
-                'uv_data': DNAExporter.get_mesh_vertex_uvs(from_bmesh_object),
-                'vertex_data': DNAExporter.get_mesh_vertex_positions(from_bmesh_object)
+                'uv_data': uv_data,
+                'vertex_data': vertex_data
             }
-            to_bmesh_object = DNAExporter.get_bmesh(mesh_object=mesh_object, rotation=0)
             to_data = {
                 'name': self.body_mesh_object.name,
-                'uv_data': DNAExporter.get_mesh_vertex_uvs(to_bmesh_object),
-                'vertex_data': DNAExporter.get_mesh_vertex_positions(to_bmesh_object),
+                'uv_data': uv_data,
+                'vertex_data': vertex_data,
                 'dna_reader': self.dna_reader
             }
 
-            from_bmesh_object.free()
-            to_bmesh_object.free()
-
             vertex_positions = meta_human_dna_core.calculate_dna_mesh_vertex_positions(from_data, to_data)
             self.body_mesh_object.data.vertices.foreach_set("co", vertex_positions.ravel()) # type: ignore
             self.body_mesh_object.data.update() # type: ignore
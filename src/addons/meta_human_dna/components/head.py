@@ -10,7 +10,7 @@ from .. import utilities
 from ..utilities import preserve_context
 from ..dna_io import (
     create_shape_key,
-    DNAExporter
+    get_blend_shape_target_deltas
 )
 from ..constants import (
     HEAD_TOPOLOGY_VERTEX_GROUPS_FILE_PATH,
@@ -145,23 +145,20 @@ class MetaHumanComponentHead(MetaHumanComponentBase):
             bpy.context.scene.cursor.location = Vector((0, 0, 0)) # type: ignore
             bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
 
-            from_bmesh_object = DNAExporter.get_bmesh(mesh_object=mesh_object, rotation=0)
+            uv_data = utilities.get_vertex_uv_data(mesh_object)
+            vertex_data = utilities.get_vertex_data(mesh_object)
             from_data = {
                 'name': mesh_object.name,
-                'uv_data': DNAExporter.get_mesh_vertex_uvs(from_bmesh_object),
-                'vertex_data': DNAExporter.get_mesh_vertex_positions(from_bmesh_object)
+                'uv_data': uv_data,
+                'vertex_data': vertex_data
             }
-            to_bmesh_object = DNAExporter.get_bmesh(mesh_object=mesh_object, rotation=0)
             to_data = {
                 'name': self.head_mesh_object.name,
-                'uv_data': DNAExporter.get_mesh_vertex_uvs(to_bmesh_object),
-                'vertex_data': DNAExporter.get_mesh_vertex_positions(to_bmesh_object),
+                'uv_data': uv_data,
+                'vertex_data': vertex_data,
                 'dna_reader': self.dna_reader
             }
 
-            from_bmesh_object.free()
-            to_bmesh_object.free()
-
             vertex_positions = meta_human_dna_core.calculate_dna_mesh_vertex_positions(from_data, to_data)
             self.head_mesh_object.data.vertices.foreach_set("co", vertex_positions.ravel()) # type: ignore
             self.head_mesh_object.data.update() # type: ignore
@@ -329,10 +326,28 @@ class MetaHumanComponentHead(MetaHumanComponentBase):
             raise ValueError('Head mesh object not found!')
         
         commands = []
+        # the mesh name, object and blend shape target deltas are only looked up once per mesh
+        meshes = {}
+        target_deltas = {}
+
+        def get_mesh(mesh_index: int) -> tuple[str, bpy.types.Object | None]:
+            if mesh_index not in meshes:
+                mesh_dna_name = self.dna_reader.getMeshName(mesh_index)
+                meshes[mesh_index] = mesh_dna_name, bpy.data.objects.get(f'{self.name}_{mesh_dna_name}')
+            return meshes[mesh_index]
+
+        def get_target_deltas(mesh_index: int) -> dict:
+            if mesh_index not in target_deltas:
+                dna_file_path = self.dna_file_path
+                target_deltas[mesh_index] = get_blend_shape_target_deltas(
+                    reader=self.dna_reader,
+                    mesh_index=mesh_index,
+                    file_path=dna_file_path if dna_file_path.suffix.lower() == '.dna' and dna_file_path.exists() else None
+                )
+            return target_deltas[mesh_index]
 
         def get_initialize_kwargs(index: int, mesh_index: int):
-            mesh_dna_name = self.dna_reader.getMeshName(mesh_index)
-            mesh_object = bpy.data.objects.get(f'{self.name}_{mesh_dna_name}')
+            _, mesh_object = get_mesh(mesh_index)
             return {
                 'mesh_object': mesh_object,
             }
@@ -340,9 +355,8 @@ class MetaHumanComponentHead(MetaHumanComponentBase):
         def get_create_kwargs(index: int, mesh_index: int):
             channel_index = self.dna_reader.getBlendShapeChannelIndex(mesh_index, index)
             shape_key_name = self.dna_reader.getBlendShapeChannelName(channel_index)
-            mesh_dna_name = self.dna_reader.getMeshName(mesh_index)
-            mesh_object = bpy.data.objects.get(f'{self.name}_{mesh_dna_name}')
-            return {
+            mesh_dna_name, mesh_object = get_mesh(mesh_index)
+            kwargs = {
                 'index': index,
                 'mesh_index': mesh_index,
                 'mesh_object': mesh_object,
@@ -352,6 +366,15 @@ class MetaHumanComponentHead(MetaHumanComponentBase):
                 'linear_modifier': self.linear_modifier,
                 'prefix': f'{mesh_dna_name}__'
             }
+            if not kwargs['is_neutral']:
+                mesh_target_deltas = get_target_deltas(mesh_index)
+                start, end = mesh_target_deltas['offsets'][index:index + 2]
+                kwargs['vertex_indices'] = mesh_target_deltas['vertex_indices'][start:end]
+                kwargs['deltas'] = mesh_target_deltas['deltas'][start:end]
+                # the fingerprints are stored against the dna file the shape keys were read from
+                if self.dna_importer.source_dna_file.exists():
+                    kwargs['file_path'] = self.dna_importer.source_dna_file
+            return kwargs
 
         for mesh_index in range(self.dna_reader.getMeshCount()):
             count = self.dna_reader.getBlendShapeTargetCount(mesh_index)
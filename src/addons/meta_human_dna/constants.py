@@ -1,5 +1,6 @@
 import os
 import math
+import tempfile
 from pathlib import Path
 from mathutils import Vector, Euler
 from typing import Literal
@@ -34,7 +35,10 @@ SCALE_FACTOR = 100.0
 SHAPE_KEY_NAME_MAX_LENGTH = 63
 SHAPE_KEY_DELTA_THRESHOLD = 1e-6
 BONE_DELTA_THRESHOLD = 1e-3
+RIG_LOGIC_OUTPUT_DELTA_THRESHOLD = 1e-6
 SHAPE_KEY_BASIS_NAME = 'Basis'
+FINGERPRINTS_PROPERTY_NAME = 'meta_human_dna_fingerprints'
+BASE_POSITION_ATTRIBUTE_NAME = 'meta_human_dna_base_position'
 BONE_TAIL_OFFSET = 1 / (SCALE_FACTOR * SCALE_FACTOR * 10)
 CUSTOM_BONE_SHAPE_SCALE = Vector([0.15] * 3)
 CUSTOM_BONE_SHAPE_NAME = "sphere_control"
@@ -113,6 +117,14 @@ SEND2UE_FACE_SETTINGS = RESOURCES_FOLDER / 'send2ue' / "meta-human_dna.json"
 
 SEND2UE_EXTENSION = RESOURCES_FOLDER / 'send2ue' / "meta_human_dna_extension.py"
 
+SHAPE_KEY_CACHE_FOLDER = Path(tempfile.gettempdir()) / ToolInfo.NAME / "shape_key_cache"
+
+SHAPE_KEY_CACHE_MAX_SIZE = 1024 * 1024 * 1024 * 2  # 2GB
+
+DNA_READER_CACHE_MAX_SIZE = 1024 * 1024 * 1024  # 1GB
+
+VERTEX_KD_TREE_CACHE_MAX_COUNT = 16
+
 ALTERNATE_TEXTURE_FILE_EXTENSIONS = [
     ".tga",
     ".png"   
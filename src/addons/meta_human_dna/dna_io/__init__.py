@@ -1,7 +1,9 @@
 from .misc import (
     get_dna_reader,
     get_dna_writer,
-    create_shape_key
+    clear_dna_reader_cache,
+    create_shape_key,
+    get_blend_shape_target_deltas
 )
 from .calibrator import DNACalibrator
 from .exporter import DNAExporter
@@ -10,7 +12,9 @@ from .importer import DNAImporter
 __all__ = [
     'get_dna_reader',
     'get_dna_writer',
+    'clear_dna_reader_cache',
     'create_shape_key',
+    'get_blend_shape_target_deltas',
     'DNACalibrator',
     'DNAExporter',
     'DNAImporter'
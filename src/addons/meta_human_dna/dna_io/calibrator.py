@@ -1,11 +1,18 @@
 import bpy
 import math
 import logging
+import numpy as np
 from typing import Callable
 from mathutils import Vector, Matrix
 from .. import utilities
 from .importer import DNAImporter
 from .exporter import DNAExporter
+from ..rig_logic import get_thread_pool
+from .misc import (
+    get_vertex_positions,
+    get_fingerprint,
+    get_fingerprints
+)
 from ..bindings import riglogic
 from ..constants import (
     SHAPE_KEY_NAME_MAX_LENGTH,
@@ -90,12 +97,18 @@ class DNACalibrator(DNAExporter, DNAImporter):
             lod_index: int,
             mesh_name: str,
             head_to_body_edge_loop_mapping: dict[str, dict[int, int]]
-        ) -> dict[int, Vector]:
+        ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the head vertex indices and the body vertex positions they should use.
+        """
+        head_vertex_indices = np.empty(0, dtype=np.int64)
+        body_vertex_positions = np.empty((0, 3), dtype=np.float64)
+
         # If this is the head, and the align head and body option is on, then we want to use the
         # exact same vertex positions for the body and head vertices where they overlap. This needs to
         # be precised to the exact floating point value.
         if mesh_name != f'{self._instance.name}_head_lod{lod_index}_mesh':
-            return {}
+            return head_vertex_indices, body_vertex_positions
 
         body_lod_index = HEAD_TO_BODY_LOD_MAPPING.get(lod_index)
         body_mesh_name = f'{self._instance.name}_body_lod{body_lod_index}_mesh'
@@ -106,32 +119,89 @@ class DNACalibrator(DNAExporter, DNAImporter):
             self._instance.output_align_head_and_body and
             body_mesh_lod
         ):
-            bmesh_object = self.get_bmesh(body_mesh_lod)
-            vertex_indices, vertex_positions = self.get_mesh_vertex_positions(bmesh_object)
-            bmesh_object.free()
-            vert_lookup = dict(zip(vertex_indices, vertex_positions))
-
-            try:
-                return {
-                    int(head_vertex_index): Vector(vert_lookup[body_vertex_index])
-                    for head_vertex_index, body_vertex_index in head_to_body_edge_loop_mapping.get(str(lod_index), {}).items()
-                }
-            except KeyError as error:
+            vertex_positions = self.convert_vertex_positions(get_vertex_positions(body_mesh_lod.data.vertices)) # type: ignore
+            mapping = head_to_body_edge_loop_mapping.get(str(lod_index), {})
+            mapped_head_vertex_indices = np.array([int(index) for index in mapping], dtype=np.int64)
+            body_vertex_indices = np.array(list(mapping.values()), dtype=np.int64)
+
+            missing = body_vertex_indices >= len(vertex_positions)
+            if missing.any():
                 logger.warning(
-                    f'Head to body vertex mapping not found for LOD {lod_index}: {error}. A vertex on '
+                    f'Head to body vertex mapping not found for LOD {lod_index}: {body_vertex_indices[missing][0]}. A vertex on '
                     f'mesh {mesh_name} or {body_mesh_name} may have been deleted.'
                 )
-        return {}
+                return head_vertex_indices, body_vertex_positions
+            
+            return mapped_head_vertex_indices, vertex_positions[body_vertex_indices]
+        
+        return head_vertex_indices, body_vertex_positions
+
+    @staticmethod
+    def get_calibrated_vertex_positions(
+            mesh_name: str,
+            vertex_positions: np.ndarray,
+            dna_vertex_positions: np.ndarray,
+            head_vertex_indices: np.ndarray,
+            body_vertex_positions: np.ndarray
+        ) -> list[list[float]]:
+        """
+        Gets the DNA vertex positions with the ones that were changed in the scene applied. This only 
+        does array math, so it can run on the thread pool.
+        """
+        # Use the vertex positions from the body mesh lookup, so that we have an exact match
+        in_range = head_vertex_indices < len(vertex_positions)
+        vertex_positions[head_vertex_indices[in_range]] = body_vertex_positions[in_range]
+
+        count = min(len(vertex_positions), len(dna_vertex_positions))
+        if len(vertex_positions) != len(dna_vertex_positions):
+            logger.warning(
+                f'Mesh "{mesh_name}" has {len(vertex_positions)} vertices, but the DNA has '
+                f'{len(dna_vertex_positions)}. Only the first {count} will be calibrated...'
+            )
+
+        # This ensures that we only modify the vertex positions that are different to avoid floating value drift
+        deltas = np.linalg.norm(vertex_positions[:count] - dna_vertex_positions[:count], axis=1)
+        changed = np.flatnonzero(deltas > 1e-6)
+        dna_vertex_positions[changed] = vertex_positions[changed]
+        return dna_vertex_positions.tolist()
+
+    @staticmethod
+    def get_calibrated_shape_key_deltas(
+            shape_key_positions: np.ndarray,
+            basis_positions: np.ndarray,
+            rotation_matrix: np.ndarray,
+            linear_modifier: float
+        ) -> tuple[list[int], list[list[float]]]:
+        """
+        Gets the sparse vertex indices and deltas of the shape key in DNA space. This only does array 
+        math, so it can run on the thread pool.
+        """
+        # the new shape key is the dna shape key with the deltas from the blender shape key applied
+        # Get the delta between the current shape key and the basis (rest) shape key
+        new_deltas = (shape_key_positions.astype(np.float64) - basis_positions) @ rotation_matrix.T
+
+        # Only modify the vertex positions that are different to avoid floating value drift
+        dna_delta_vertex_indices = np.flatnonzero(
+            np.linalg.norm(new_deltas, axis=1) > SHAPE_KEY_DELTA_THRESHOLD
+        )
+        # Apply the coordinate system conversion and linear modifier for the scene units to the delta
+        dna_delta_values = new_deltas[dna_delta_vertex_indices] / linear_modifier
+        return dna_delta_vertex_indices.tolist(), dna_delta_values.tolist()
 
     def calibrate_vertex_positions(self):
         additional_meshes_by_lod = {}
         mesh_index_lookup = {self._dna_reader.getMeshName(index): index for index in range(self._dna_reader.getMeshCount())}
         head_to_body_edge_loop_mapping = utilities.get_head_to_body_edge_loop_mapping()
 
+        # The mesh data is read from the scene and DNA on the main thread, while the calibration math for 
+        # the meshes already read runs on the thread pool. The results are then written in order.
+        thread_pool = get_thread_pool()
+        calibrated_meshes = []
+
         for lod_index, mesh_objects in self._export_lods.items():
             logger.info(f'Calibrating LOD {lod_index} vertex positions...')
             for mesh_object, _ in mesh_objects:
-                body_mesh_lookup = self._get_body_mesh_lookup(
+                head_vertex_indices, body_vertex_positions = self._get_body_mesh_lookup(
                     lod_index=lod_index, 
                     mesh_name=mesh_object.name,
                     head_to_body_edge_loop_mapping=head_to_body_edge_loop_mapping
@@ -149,30 +219,35 @@ class DNACalibrator(DNAExporter, DNAImporter):
                     logger.warning(f'Mesh "{real_name}" not found in DNA. This mesh will not be calibrated...')
                     continue
 
-                bmesh_object = self.get_bmesh(mesh_object)
-                vertex_indices, vertex_positions = self.get_mesh_vertex_positions(bmesh_object)
-                bmesh_object.free()
+                # The writer already has the source DNA vertex positions, so if the mesh has not changed since 
+                # it was imported from the source DNA, they don't need to be calibrated
+                positions = get_vertex_positions(mesh_object.data.vertices) # type: ignore
+                fingerprints = get_fingerprints(mesh_object.data, self.source_dna_file) # type: ignore
+                if len(head_vertex_indices) == 0 and fingerprints.get('vertices') == get_fingerprint(positions):
+                    logger.info(f'"{real_name}" vertex positions have not changed. Skipping...')
+                    continue
 
                 # Read these from the DNA file and modify these arrays so that they match the vertex indices match
-                x_values = self._dna_reader.getVertexPositionXs(mesh_index)
-                y_values = self._dna_reader.getVertexPositionYs(mesh_index)
-                z_values = self._dna_reader.getVertexPositionZs(mesh_index)
-
-                for vertex_index in vertex_indices:
-                    # See if we can get the vertex position from the body mesh lookup first, so that we have an exact match
-                    vertex_position = body_mesh_lookup.get(int(vertex_index), Vector(vertex_positions[vertex_index]))
-                    dna_vertex_position = Vector((x_values[vertex_index], y_values[vertex_index], z_values[vertex_index]))
-                    delta = vertex_position - dna_vertex_position
-                    # This ensures that we only modify the vertex positions that are different to avoid floating value drift
-                    if delta.length > 1e-6:
-                        x_values[vertex_index] = vertex_position.x
-                        y_values[vertex_index] = vertex_position.y
-                        z_values[vertex_index] = vertex_position.z
-
-                self._dna_writer.setVertexPositions(
-                    meshIndex=mesh_index, 
-                    positions=[[x,y,z] for x,y,z in zip(x_values, y_values, z_values)]
-                )
+                dna_vertex_positions = np.column_stack((
+                    self._dna_reader.getVertexPositionXs(mesh_index),
+                    self._dna_reader.getVertexPositionYs(mesh_index),
+                    self._dna_reader.getVertexPositionZs(mesh_index)
+                )).astype(np.float64)
+
+                calibrated_meshes.append((mesh_index, thread_pool.submit(
+                    self.get_calibrated_vertex_positions,
+                    real_name,
+                    self.convert_vertex_positions(positions),
+                    dna_vertex_positions,
+                    head_vertex_indices,
+                    body_vertex_positions
+                )))
+
+        for mesh_index, future in calibrated_meshes:
+            self._dna_writer.setVertexPositions(
+                meshIndex=mesh_index, 
+                positions=future.result()
+            )
 
     def calibrate_shape_keys(self):
         if self._component_type != 'head':
@@ -204,14 +279,27 @@ class DNACalibrator(DNAExporter, DNAImporter):
                 
                 # helps to track the largest delta count for the shape keys
                 largest_delta_count = 0
+                unchanged_count = 0
                     
-                # Get the vertex positions for the mesh object
-                bmesh_object = self.get_bmesh(mesh_object)
-                vertex_indices, _ = self.get_mesh_vertex_positions(bmesh_object)
-                bmesh_object.free()
+                # Get the basis positions for the mesh object
+                basis_positions = get_vertex_positions(shape_key_basis.data)
+
+                # The writer already has the source DNA deltas, so shape keys that have not changed since they were 
+                # imported from the source DNA don't need to be calibrated. The deltas are relative to the basis, so 
+                # this is only true if the basis has not changed either.
+                fingerprints = get_fingerprints(mesh_object.data, self.source_dna_file) # type: ignore
+                shape_key_fingerprints = {}
+                if fingerprints.get('basis') == get_fingerprint(basis_positions):
+                    shape_key_fingerprints = fingerprints.get('shape_keys', {})
+                basis_positions = basis_positions.astype(np.float64)
                 
                 # DNA is Y-up, Blender is Z-up, so we need to rotate the deltas
-                rotation_matrix = Matrix.Rotation(math.radians(-90), 4, 'X')
+                rotation_matrix = np.array(Matrix.Rotation(math.radians(-90), 3, 'X'), dtype=np.float64)
+
+                # The shape keys are read on the main thread, while the deltas of the shape keys already 
+                # read are calculated on the thread pool. The results are then written in order.
+                thread_pool = get_thread_pool()
+                calibrated_targets = []
 
                 for index in range(self._dna_reader.getBlendShapeTargetCount(mesh_index)):
                     channel_index = self._dna_reader.getBlendShapeChannelIndex(mesh_index, index)
@@ -226,26 +314,21 @@ class DNACalibrator(DNAExporter, DNAImporter):
                         logger.error(f"Shape key '{shape_key_name}' not found for mesh '{real_mesh_name}'. Skipping calibration...")
                         continue
 
-                    dna_delta_vertex_indices = []
-                    dna_delta_values = []
-
-                    # the new shape key is the dna shape key with the deltas from the blender shape key applied
-                    for vertex_index in vertex_indices:
-                        # get the positions of the points
-                        # Get the delta between the current shape key and the basis (rest) shape key
-                        new_delta = rotation_matrix @ (shape_key_block.data[vertex_index].co.copy() - shape_key_basis.data[vertex_index].co) # type: ignore
-
-                        # Only modify the vertex positions that are different to avoid floating value drift
-                        if new_delta.length > SHAPE_KEY_DELTA_THRESHOLD:
-                            # Apply the coordinate system conversion and linear modifier for the scene units to the delta
-                            converted_delta = new_delta / self._linear_modifier
-                            dna_delta_vertex_indices.append(vertex_index)
-                            dna_delta_values.append((
-                                converted_delta.x,
-                                converted_delta.y,
-                                converted_delta.z
-                            ))
+                    shape_key_positions = get_vertex_positions(shape_key_block.data)
+                    if shape_key_fingerprints.get(shape_key_block.name) == get_fingerprint(shape_key_positions):
+                        unchanged_count += 1
+                        continue
+
+                    calibrated_targets.append((index, thread_pool.submit(
+                        self.get_calibrated_shape_key_deltas,
+                        shape_key_positions,
+                        basis_positions,
+                        rotation_matrix,
+                        self._linear_modifier
+                    )))
 
+                for index, future in calibrated_targets:
+                    dna_delta_vertex_indices, dna_delta_values = future.result()
                     if len(dna_delta_vertex_indices) > largest_delta_count:
                         largest_delta_count = len(dna_delta_vertex_indices)
 
@@ -263,6 +346,8 @@ class DNACalibrator(DNAExporter, DNAImporter):
                     )
 
                 logger.debug(f'Largest Shape Key delta count for mesh {real_mesh_name} is {largest_delta_count}')
+                if unchanged_count:
+                    logger.info(f'Skipped {unchanged_count} shape keys on mesh {real_mesh_name} that have not changed')
 
     def calibrate_bone_transforms(self):
         ignored_bone_names = [i for i, _ in self._extra_bones]
@@ -2,15 +2,15 @@ import os
 import bpy
 import math
 import json
-import bmesh
 import logging
+import numpy as np
 from typing import Callable
 from pathlib import Path
-from mathutils import Vector, Matrix
+from mathutils import Matrix
 from .. import utilities
 from ..utilities import preserve_context
-from ..rig_logic import RigLogicInstance
-from .misc import get_dna_writer, get_dna_reader
+from ..rig_logic import RigLogicInstance, get_thread_pool
+from .misc import get_dna_writer, get_dna_reader, get_vertex_positions
 from ..bindings import riglogic
 from ..exceptions import InvalidComponentTypeError
 from ..constants import (
@@ -34,7 +34,9 @@ class DNAExporter:
             vertex_colors: bool = True,
             file_name: str | None = None,
             component_type: ComponentType | None = None,
-            reader: 'riglogic.BinaryStreamReader | None' = None
+            reader: 'riglogic.BinaryStreamReader | None' = None,
+            max_skin_influences: int = 0,
+            normalize_skin_weights: bool = False
         ):
         self._instance = instance
         self._linear_modifier = linear_modifier
@@ -45,6 +47,8 @@ class DNAExporter:
         self._include_bones = bones
         self._include_textures = textures
         self._include_vertex_colors = vertex_colors
+        self._max_skin_influences = max_skin_influences
+        self._normalize_skin_weights = normalize_skin_weights
         self._component_type = component_type or instance.output_component
 
         self._output_folder = Path(bpy.path.abspath(instance.output_folder_path))
@@ -146,7 +150,7 @@ class DNAExporter:
         self._vertex_color_data = [{
             'indices': [],
             'values': [],
-        }] * len(self._mesh_indices)
+        } for _ in self._mesh_indices]
 
     def validate(self) -> tuple[bool, str, str, Callable | None]:
         if not self._rig_object:
@@ -210,31 +214,6 @@ class DNAExporter:
             )
 
 
-    @staticmethod
-    def get_bmesh(mesh_object: bpy.types.Object, rotation: float = -90) -> bmesh.types.BMesh:
-        # create an empty BMesh and fill it in from the mesh data
-        bmesh_object = bmesh.new()
-        bmesh_object.from_mesh(mesh=mesh_object.data) # type: ignore
-
-        # Rotate the mesh so that it's Y-up before reading the vertex data
-        bmesh.ops.rotate(
-            bmesh_object, 
-            cent=Vector((0,0,0)), 
-            matrix=Matrix.Rotation(math.radians(rotation), 4, 'X'), 
-            verts=bmesh_object.verts # type: ignore
-        )
-        bmesh_object.verts.index_update()
-        bmesh_object.verts.ensure_lookup_table()
-        return bmesh_object
-
-    @staticmethod
-    def get_mesh_faces(bmesh_object: bmesh.types.BMesh) -> list[tuple[int, list[int]]]:
-        bmesh_object.faces.ensure_lookup_table()
-        return [
-            (face.index, [vert.index for vert in face.verts])
-            for face in bmesh_object.faces # type: ignore
-        ]
-    
     @staticmethod
     @preserve_context
     def get_bone_transforms(
@@ -309,94 +288,157 @@ class DNAExporter:
         return indices, bone_names, hierarchy, is_leaf, translations, rotations
 
     @staticmethod
-    def get_mesh_vertex_positions(
-            bmesh_object: bmesh.types.BMesh, 
-            duplicate_lookup: dict | None = None
-        ) -> tuple[list[int], list[list[float]]]:
-        indices = []
-        positions = []
-        if not duplicate_lookup:
-            duplicate_lookup = {}
-
-        for vert in bmesh_object.verts: # type: ignore
-            positions.append([
-                vert.co.x*SCALE_FACTOR,
-                vert.co.y*SCALE_FACTOR,
-                vert.co.z*SCALE_FACTOR
-            ])
-            # Get the original vertex index if the vertex is a duplicate, otherwise use the current index
-            vertex_index = duplicate_lookup.get(vert.index, vert.index)
-            indices.append(vertex_index)
-        return indices, positions
-
-    @staticmethod
-    def get_mesh_vertex_normals(bmesh_object: bmesh.types.BMesh) -> tuple[list[int], list[list[float]]]:
-        indices = []
-        normals = []
-        # TODO: Use split_normals from Mesh instead. Also check if these are stored as triangles?
-        # https://docs.blender.org/api/current/bpy.types.MeshLoopTriangle.html
-
-        for vert in bmesh_object.verts: # type: ignore
-            normals.append([
-                vert.normal.x*SCALE_FACTOR, 
-                vert.normal.y*SCALE_FACTOR, 
-                vert.normal.z*SCALE_FACTOR
-            ])
-            indices.append(vert.index)
-        return indices, normals
+    def convert_vertex_positions(positions: np.ndarray, rotation: float = -90) -> np.ndarray:
+        """
+        Converts (N, 3) Blender vertex positions to DNA space, by rotating them so that they're 
+        Y-up and scaling them to DNA units.
+        """
+        rotation_matrix = np.array(Matrix.Rotation(math.radians(rotation), 3, 'X'), dtype=np.float64)
+        return (np.asarray(positions, dtype=np.float64) @ rotation_matrix.T) * SCALE_FACTOR
 
     @staticmethod
     def get_mesh_vertex_groups(mesh_object: bpy.types.Object) -> dict[str, list[tuple[int, float]]]:
-        # Create a lookup table for the vertex group names by their index
-        vertex_group_lookup = {vertex_group.index: vertex_group.name for vertex_group in mesh_object.vertex_groups}
-        # Initialize the vertex groups dictionary
-        vertex_groups = {vertex_group.name: [] for vertex_group in mesh_object.vertex_groups}
-
-        # Loop through the vertices and get the vertex group names and the vertex and weights
-        for vertex in mesh_object.data.vertices: # type: ignore
-            vertex_group_names = [vertex_group_lookup.get(group.group, '') for group in vertex.groups]
-            for vertex_group_name in vertex_group_names:
-                # Skip the topology vertex groups
-                if vertex_group_name.startswith(TOPO_GROUP_PREFIX):
-                    continue
-
-                vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
-                if vertex_group:
-                    weight = vertex_group.weight(vertex.index)
-                    if weight > 0:
-                        vertex_groups[vertex_group_name].append((vertex.index, weight))
-
+        # Skip the topology vertex groups
+        group_indices = np.array([
+            -1 if vertex_group.name.startswith(TOPO_GROUP_PREFIX) else vertex_group.index
+            for vertex_group in mesh_object.vertex_groups
+        ], dtype=np.int64)
+        offsets, indices, weights = utilities.get_skin_weights(mesh_object, group_joint_indices=group_indices)
+        vertex_indices = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+        # Group the vertex and weights by their vertex group
+        order = np.argsort(indices, kind='stable')
+        vertex_indices, indices, weights = vertex_indices[order], indices[order], weights[order]
+        boundaries = np.searchsorted(indices, np.arange(len(mesh_object.vertex_groups) + 1))
+        vertex_groups = {}
+        for vertex_group in mesh_object.vertex_groups:
+            start, end = boundaries[vertex_group.index], boundaries[vertex_group.index + 1]
+            vertex_groups[vertex_group.name] = list(zip(
+                vertex_indices[start:end].tolist(), 
+                weights[start:end].tolist()
+            ))
         return vertex_groups
     
     @staticmethod
-    def get_mesh_vertex_uvs(bmesh_object: bmesh.types.BMesh) -> tuple[list[int], list[list[float]]]:
-        uv_layer = bmesh_object.loops.layers.uv.active
-        if not uv_layer:
-            return [], []
+    def get_color_attribute(mesh: bpy.types.Mesh) -> bpy.types.Attribute | None:
+        # vertex colors are stored as byte colors on the face corners
+        color_attribute = mesh.color_attributes.active_color
+        if color_attribute and color_attribute.domain == 'CORNER' and color_attribute.data_type == 'BYTE_COLOR':
+            return color_attribute
+        for color_attribute in mesh.color_attributes:
+            if color_attribute.domain == 'CORNER' and color_attribute.data_type == 'BYTE_COLOR':
+                return color_attribute
+
+    def get_scene_mesh_data(self, mesh_object: bpy.types.Object) -> dict:
+        """
+        Reads the arrays of the mesh that are needed for the DNA with foreach_get. This uses Blender 
+        data, so it must run on the main thread.
+        """
+        mesh: bpy.types.Mesh = mesh_object.data # type: ignore
+        loop_count = len(mesh.loops)
+
+        loop_vertex_indices = np.empty(loop_count, dtype=np.int32)
+        mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+        polygon_loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_start', polygon_loop_starts)
+        polygon_loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_total', polygon_loop_totals)
+
+        corner_normals = np.empty(loop_count * 3, dtype=np.float32)
+        mesh.corner_normals.foreach_get('vector', corner_normals)
+
+        loop_uvs = np.zeros(loop_count * 2, dtype=np.float32)
+        if mesh.uv_layers.active:
+            mesh.uv_layers.active.uv.foreach_get('vector', loop_uvs)
+        else:
+            logger.error(
+                f'Mesh "{mesh_object.name}" has no active UV layer, so its UVs are exported as zeros. '
+                'Unwrap its UVs or run the export validations to fix this.'
+            )
 
-        uv_indices = list(range(len(bmesh_object.verts)))
-        uv_positions = []
+        loop_colors = None
+        color_attribute = self.get_color_attribute(mesh)
+        if self._include_vertex_colors and color_attribute:
+            loop_colors = np.empty(loop_count * 4, dtype=np.float32)
+            color_attribute.data.foreach_get('color_srgb', loop_colors) # type: ignore
+            loop_colors = loop_colors.reshape(-1, 4)
+
+        return {
+            'vertex_positions': get_vertex_positions(mesh.vertices),
+            'loop_vertex_indices': loop_vertex_indices,
+            'polygon_loop_starts': polygon_loop_starts,
+            'polygon_loop_totals': polygon_loop_totals,
+            'corner_normals': corner_normals.reshape(-1, 3),
+            'loop_uvs': loop_uvs.reshape(-1, 2),
+            'loop_colors': loop_colors
+        }
+
+    @classmethod
+    def get_dna_mesh_data(
+            cls,
+            vertex_positions: np.ndarray,
+            loop_vertex_indices: np.ndarray,
+            polygon_loop_starts: np.ndarray,
+            polygon_loop_totals: np.ndarray,
+            corner_normals: np.ndarray,
+            loop_uvs: np.ndarray,
+            loop_colors: np.ndarray | None
+        ) -> dict:
+        """
+        Computes the DNA mesh data from the arrays read from the scene. This does not use Blender 
+        data, so it can run on the thread pool.
+        """
+        # There is a vertex layout for each unique vertex and uv pair, so the vertices are split along 
+        # the uv seams and each layout has all the loop data it needs. Adding zero turns -0.0 into 0.0, 
+        # so a uv of zero is always the same pair whatever its sign.
+        uvs = loop_uvs + 0.0
+        _, layout_loop_indices, loop_layout_indices = np.unique(
+            np.column_stack((loop_vertex_indices, uvs)),
+            axis=0,
+            return_index=True,
+            return_inverse=True
+        )
+        loop_layout_indices = loop_layout_indices.ravel()
+        layout_indices = np.arange(len(layout_loop_indices))
         
-        for face in bmesh_object.faces:
-            for loop in face.loops:
-                uv_indices[loop.vert.index] = loop.index
-                uv_positions.append(list(loop[uv_layer].uv[:]))
+        # Set the vertex layout so DNA knows how to read the vertex, 
+        # normal, and uv data from their respective arrays
+        layouts = np.column_stack((
+            loop_vertex_indices[layout_loop_indices], 
+            layout_indices, 
+            layout_indices
+        ))
+
+        # The positions are rotated so that they're Y-up and scaled in one multiply. The normals have 
+        # always been exported with the same transform as the positions.
+        normal_transform = np.array(Matrix.Rotation(math.radians(-90), 3, 'X'), dtype=np.float64) * SCALE_FACTOR
+        normals = corner_normals[layout_loop_indices].astype(np.float64) @ normal_transform.T
+
+        face_layout_indices = loop_layout_indices.tolist()
+        faces = [
+            (face_index, face_layout_indices[start:start + total])
+            for face_index, (start, total) in enumerate(zip(
+                polygon_loop_starts.tolist(), 
+                polygon_loop_totals.tolist()
+            ))
+        ]
+
+        vertex_colors = None
+        if loop_colors is not None:
+            vertex_colors = {
+                'indices': layout_loop_indices.tolist(),
+                'values': loop_colors.tolist()
+            }
+
+        return {
+            'layouts': layouts.tolist(),
+            'vertex_positions': cls.convert_vertex_positions(vertex_positions).tolist(),
+            'normals': normals.tolist(),
+            'uvs': uvs[layout_loop_indices].tolist(),
+            'faces': faces,
+            'vertex_colors': vertex_colors
+        }
 
-        return uv_indices, uv_positions
-    
-    def set_dna_vertex_colors(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        vertex_color_indices = list(range(len(bmesh_object.verts)))
-        vertex_color_values = []
-        color_layer = bmesh_object.loops.layers.color.active
-        if color_layer:
-            for face in bmesh_object.faces:
-                for loop in face.loops:
-                    vertex_color_indices[loop.vert.index] = loop.index
-                    vertex_color_values.append(list(loop[color_layer][:]))
-
-            self._vertex_color_data[mesh_index]['indices'] = vertex_color_indices
-            self._vertex_color_data[mesh_index]['values'] = vertex_color_values
-    
     def set_dna_vertex_positions(
             self,
             mesh_index: int, 
@@ -429,34 +471,33 @@ class DNAExporter:
 
     def set_dna_vertex_groups(self, mesh_index: int, mesh_object: bpy.types.Object):
         self._dna_writer.clearSkinWeights(meshIndex=mesh_index)
-        # Create a lookup table for the vertex group names by their index
-        vertex_group_lookup = {vertex_group.index: vertex_group.name for vertex_group in mesh_object.vertex_groups}
-
-        # Loop through the vertices and get the vertex group names and the vertex and weights
-        for vertex in mesh_object.data.vertices: # type: ignore
-            vertex_group_names = [vertex_group_lookup.get(group.group, '') for group in vertex.groups]
-            bone_indices = []
-            weights = []
-
-            for vertex_group_name in vertex_group_names:
-                bone_index = self._bone_index_lookup.get(vertex_group_name)
-                vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
-                if bone_index and vertex_group:    
-                    weight = vertex_group.weight(vertex.index)
-                    if weight > 0:
-                        bone_indices.append(bone_index)
-                        weights.append(weight)
+        # Map the vertex group indices to their joint indices, the groups without a joint are left out
+        group_joint_indices = np.array([
+            self._bone_index_lookup.get(vertex_group.name, -1)
+            for vertex_group in mesh_object.vertex_groups
+        ], dtype=np.int64)
+        offsets, joint_indices, weights = utilities.get_skin_weights(
+            mesh_object, 
+            group_joint_indices=group_joint_indices,
+            max_influences=self._max_skin_influences,
+            normalize=self._normalize_skin_weights
+        )
+        offsets = offsets.tolist()
+        joint_indices = joint_indices.tolist()
+        weights = weights.tolist()
 
+        for vertex_index in range(len(offsets) - 1):
+            start, end = offsets[vertex_index], offsets[vertex_index + 1]
             self._dna_writer.setSkinWeightsJointIndices(
                 meshIndex=mesh_index, 
-                vertexIndex=vertex.index, 
-                jointIndices=bone_indices
+                vertexIndex=vertex_index, 
+                jointIndices=joint_indices[start:end]
             )
             self._dna_writer.setSkinWeightsValues(
                 meshIndex=mesh_index, 
-                vertexIndex=vertex.index,
-                weights=weights
-            )      
+                vertexIndex=vertex_index,
+                weights=weights[start:end]
+            )
 
     def set_dna_bones(
             self, 
@@ -569,8 +610,20 @@ class DNAExporter:
             )
             self._dna_writer.setLODMeshMapping(lod=lod_index, index=lod_index)
 
+            # The mesh data is read from the scene on the main thread, while the DNA data for the meshes 
+            # already read is computed on the thread pool. The results are then written in order.
+            thread_pool = get_thread_pool()
+            exported_meshes = []
             for mesh_object, mesh_index in mesh_objects:
+                logger.info(f'Reading mesh: "{mesh_object.name}"...')
+                exported_meshes.append((mesh_object, mesh_index, thread_pool.submit(
+                    self.get_dna_mesh_data,
+                    **self.get_scene_mesh_data(mesh_object=mesh_object)
+                )))
+
+            for mesh_object, mesh_index, future in exported_meshes:
                 real_name = mesh_object.name.replace(f'{self._prefix}_', '')
+                mesh_data = future.result()
 
                 logger.info(f'Exporting mesh: "{mesh_object.name}" to DNA as "{real_name}"...')
                 self._dna_writer.clearFaceVertexLayoutIndices(meshIndex=mesh_index)
@@ -579,37 +632,23 @@ class DNAExporter:
 
                 # Set the mesh name
                 self._dna_writer.setMeshName(index=mesh_index, name=real_name)
-                bmesh_object = self.get_bmesh(mesh_object)
-                # Split the mesh along UV islands so that we have all the UV loop indices needed for each vertex index
-                split_to_original_vert_lookup = utilities.split_mesh_along_uv_islands(bmesh_object=bmesh_object)
-
-                vertex_indices, vertex_positions = self.get_mesh_vertex_positions(
-                    bmesh_object=bmesh_object,
-                    duplicate_lookup=split_to_original_vert_lookup
-                )
-                normal_indices, normals = self.get_mesh_vertex_normals(bmesh_object=bmesh_object)
-                uv_indices, uvs = self.get_mesh_vertex_uvs(bmesh_object=bmesh_object)
-                faces = self.get_mesh_faces(bmesh_object=bmesh_object)
-                
-                # Set the vertex color data so it can be saved to JSON later
-                if self._include_vertex_colors:
-                    self.set_dna_vertex_colors(mesh_index=mesh_index, bmesh_object=bmesh_object)
 
                 # Set the vertex layout so DNA knows how to read the vertex, 
                 # normal, and uv data from their respective arrays
                 self._dna_writer.setVertexLayouts(
                     meshIndex=mesh_index, 
-                    layouts=[list(item) for item in zip(vertex_indices, uv_indices, normal_indices)]
+                    layouts=mesh_data['layouts']
                 )
 
-                self.set_dna_vertex_positions(mesh_index, vertex_positions)
-                self.set_dna_faces(mesh_index, faces)
-                self.set_dna_normals(mesh_index, normals)
-                self.set_dna_uvs(mesh_index, uvs)
+                self.set_dna_vertex_positions(mesh_index, mesh_data['vertex_positions'])
+                self.set_dna_faces(mesh_index, mesh_data['faces'])
+                self.set_dna_normals(mesh_index, mesh_data['normals'])
+                self.set_dna_uvs(mesh_index, mesh_data['uvs'])
                 self.set_dna_vertex_groups(mesh_index, mesh_object)
 
-                # Now free the BMesh from memory without applying the changes back to the mesh
-                bmesh_object.free()
+                # Set the vertex color data so it can be saved to JSON later
+                if mesh_data['vertex_colors']:
+                    self._vertex_color_data[mesh_index] = mesh_data['vertex_colors']
         
         self._dna_writer.write()
         if not riglogic.Status.isOk():
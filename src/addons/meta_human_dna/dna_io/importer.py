@@ -1,11 +1,16 @@
 import bpy
 import math
-import bmesh
 import json
 import logging
+import numpy as np
 from pathlib import Path
 from mathutils import Vector, Matrix, Euler
-from .misc import get_dna_reader
+from .misc import (
+    get_dna_reader,
+    get_vertex_positions,
+    get_fingerprint,
+    set_fingerprints
+)
 from ..properties import MetahumanDnaImportProperties
 from .. import utilities
 from ..rig_logic import RigLogicInstance
@@ -43,9 +48,9 @@ class DNAImporter:
         self._linear_modifier = linear_modifier
 
         if component_type == 'head':
-            self.source_dna_file = Path(bpy.path.abspath(str(dna_file_path) or instance.head_dna_file_path))
+            self.source_dna_file = Path(bpy.path.abspath(str(dna_file_path or instance.head_dna_file_path)))
         elif component_type == 'body':
-            self.source_dna_file = Path(bpy.path.abspath(str(dna_file_path) or instance.body_dna_file_path))
+            self.source_dna_file = Path(bpy.path.abspath(str(dna_file_path or instance.body_dna_file_path)))
 
         # Determine the file format of the DNA file
         file_format = 'binary' if (dna_file_path or self.source_dna_file).suffix.lower() == ".dna" else 'json'
@@ -65,10 +70,8 @@ class DNAImporter:
 
         self._prefix = self._instance.name
         self._import_lods = {}
-        self._index_to_vert = {}
-        self._index_to_face = {}
-        self._vert_index_to_dna_index = {}
-        self._face_index_to_dna_index = {}
+        self._layout_vertex_indices = np.empty(0, dtype=np.int64)
+        self._loop_layout_indices = np.empty(0, dtype=np.int64)
         self._vertex_color_data = []
         self._default_vertex_color_layout = False
         self._component_type = component_type
@@ -245,82 +248,114 @@ class DNAImporter:
         pose_bone.custom_shape_scale_xyz = CUSTOM_BONE_SHAPE_SCALE
 
     def set_vertex_groups(self, mesh_index: int, mesh_object: bpy.types.Object):
-        for vertex in mesh_object.data.vertices: # type: ignore
-            vertex_bone_indices = self._dna_reader.getSkinWeightsJointIndices(mesh_index, vertex.index)
-            vertex_weights = self._dna_reader.getSkinWeightsValues(mesh_index, vertex.index)
-
-            for bone_index, weight in zip(vertex_bone_indices, vertex_weights):
-                vertex_group_name = self._dna_reader.getJointName(bone_index)
-                vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
-                if not vertex_group:
-                    vertex_group = mesh_object.vertex_groups.new(name=vertex_group_name)
-                vertex_group.add(
-                    index=[vertex.index], 
-                    weight=weight, 
-                    type='REPLACE'
-                )
-
-    def set_mesh_normals(self, mesh_index: int, mesh: bpy.types.Mesh):
-        x_values = self._dna_reader.getVertexNormalXs(mesh_index)
-        y_values = self._dna_reader.getVertexNormalYs(mesh_index)
-        z_values = self._dna_reader.getVertexNormalZs(mesh_index)
-        normal_indices = self._dna_reader.getVertexLayoutNormalIndices(mesh_index)        
-        mesh.normals_split_custom_set_from_vertices([
-            Vector((
-                x_values[normal_indices[index]]*self._linear_modifier, 
-                y_values[normal_indices[index]]*self._linear_modifier, 
-                z_values[normal_indices[index]]*self._linear_modifier
-            )).normalized() for index in self._index_to_vert.keys()])  # type: ignore
+        vertex_indices = []
+        joint_indices = []
+        weights = []
+        for vertex_index in range(len(mesh_object.data.vertices)): # type: ignore
+            vertex_joint_indices = self._dna_reader.getSkinWeightsJointIndices(mesh_index, vertex_index)
+            vertex_indices.extend([vertex_index] * len(vertex_joint_indices))
+            joint_indices.extend(vertex_joint_indices)
+            weights.extend(self._dna_reader.getSkinWeightsValues(mesh_index, vertex_index))
+
+        if not joint_indices:
+            return
 
+        vertex_indices = np.array(vertex_indices, dtype=np.int64)
+        joint_indices = np.array(joint_indices, dtype=np.int64)
+        weights = np.array(weights, dtype=np.float32)
 
-    def set_mesh_vertex_positions(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        x_values = self._dna_reader.getVertexPositionXs(mesh_index)
-        y_values = self._dna_reader.getVertexPositionYs(mesh_index)
-        z_values = self._dna_reader.getVertexPositionZs(mesh_index)
+        # create the vertex groups in the order the joints are first used by the vertices
+        unique_joint_indices, first_indices = np.unique(joint_indices, return_index=True)
+        vertex_groups = {}
+        for joint_index in unique_joint_indices[np.argsort(first_indices)].tolist():
+            vertex_group_name = self._dna_reader.getJointName(joint_index)
+            vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
+            if not vertex_group:
+                vertex_group = mesh_object.vertex_groups.new(name=vertex_group_name)
+            vertex_groups[joint_index] = vertex_group
+
+        # group the influences by joint and then by weight, so each vertex group is filled with
+        # one call per distinct weight value
+        order = np.lexsort((vertex_indices, weights, joint_indices))
+        vertex_indices = vertex_indices[order]
+        joint_indices = joint_indices[order]
+        weights = weights[order]
+        boundaries = np.flatnonzero(
+            (np.diff(joint_indices) != 0) | (np.diff(weights) != 0)
+        ) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(weights)]))
+
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            vertex_groups[int(joint_indices[start])].add(
+                index=vertex_indices[start:end].tolist(), 
+                weight=float(weights[start]), 
+                type='REPLACE'
+            )
 
-        self._index_to_vert.clear()
-        for dna_index in self._dna_reader.getVertexLayoutPositionIndices(mesh_index):
-            if not self._index_to_vert.get(dna_index):
-                vert = bmesh_object.verts.new([
-                    x_values[dna_index]*self._linear_modifier, 
-                    y_values[dna_index]*self._linear_modifier, 
-                    z_values[dna_index]*self._linear_modifier
-                ])
-                self._index_to_vert[dna_index] = vert
-
-        bmesh_object.verts.index_update()
-        # flip the dictionary so that we can get the dna index from the vertex index
-        self._vert_index_to_dna_index = {vert.index: index for index, vert in self._index_to_vert.items()}
-        # sort the vertices so that they are in the same order as the DNA file
-        bmesh_object.verts.sort(key=lambda v: self._vert_index_to_dna_index[v.index])
-        bmesh_object.verts.ensure_lookup_table()
-
-
-    def set_mesh_face_layout(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        vertex_indices = self._dna_reader.getVertexLayoutPositionIndices(mesh_index)
-        self._index_to_face.clear()
+    def set_mesh_normals(self, mesh_index: int, mesh: bpy.types.Mesh):
+        x_values = np.asarray(self._dna_reader.getVertexNormalXs(mesh_index), dtype=np.float32)
+        y_values = np.asarray(self._dna_reader.getVertexNormalYs(mesh_index), dtype=np.float32)
+        z_values = np.asarray(self._dna_reader.getVertexNormalZs(mesh_index), dtype=np.float32)
+        normal_indices = np.asarray(self._dna_reader.getVertexLayoutNormalIndices(mesh_index), dtype=np.int64)
+
+        # the normals are stored per vertex layout, so they are set on each loop
+        loop_normal_indices = normal_indices[self._loop_layout_indices]
+        normals = np.column_stack((
+            x_values[loop_normal_indices], 
+            y_values[loop_normal_indices], 
+            z_values[loop_normal_indices]
+        ))
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        mesh.normals_split_custom_set(normals) # type: ignore
+
+    def set_mesh_vertex_positions(self, mesh_index: int, mesh: bpy.types.Mesh):
+        x_values = np.asarray(self._dna_reader.getVertexPositionXs(mesh_index), dtype=np.float64)
+        y_values = np.asarray(self._dna_reader.getVertexPositionYs(mesh_index), dtype=np.float64)
+        z_values = np.asarray(self._dna_reader.getVertexPositionZs(mesh_index), dtype=np.float64)
+        position_indices = np.asarray(self._dna_reader.getVertexLayoutPositionIndices(mesh_index), dtype=np.int64)
+
+        # create a vertex for each position used by the layout in the same order as the DNA file
+        dna_indices, self._layout_vertex_indices = np.unique(position_indices, return_inverse=True)
+        positions = np.column_stack((
+            x_values[dna_indices], 
+            y_values[dna_indices], 
+            z_values[dna_indices]
+        )) * self._linear_modifier
+
+        mesh.vertices.add(len(dna_indices))
+        mesh.vertices.foreach_set('co', positions.astype(np.float32).ravel())
+
+    def set_mesh_face_layout(self, mesh_index: int, mesh: bpy.types.Mesh):
+        loop_layout_indices = []
+        loop_totals = []
+        face_vertex_sets = set()
         for index in range(self._dna_reader.getFaceCount(mesh_index)):
-            try:
-                face = bmesh_object.faces.new([
-                    bmesh_object.verts[vertex_indices[i]]
-                    for i in self._dna_reader.getFaceVertexLayoutIndices(mesh_index, index)
-                ])
-                self._index_to_face[index] = face
-            except (RuntimeError, Exception):
+            layout_indices = list(self._dna_reader.getFaceVertexLayoutIndices(mesh_index, index))
+            vertex_indices = frozenset(self._layout_vertex_indices[layout_indices].tolist())
+            # a face needs at least 3 unique vertices and can't be a duplicate of another face
+            if len(layout_indices) < 3 or len(vertex_indices) != len(layout_indices) or vertex_indices in face_vertex_sets:
                 logger.error(f"Face {index} failed to create on mesh index {mesh_index}")
-
-        bmesh_object.faces.index_update()
-        # flip the dictionary so that we can get the dna index from the face index
-        self._face_index_to_dna_index = {face.index: index for index, face in self._index_to_face.items()}
-        bmesh_object.faces.sort(key=lambda f: self._face_index_to_dna_index[f.index])
-        bmesh_object.faces.ensure_lookup_table()
-
-        
-    def set_smooth(self, bmesh_object: bmesh.types.BMesh):
+                continue
+            face_vertex_sets.add(vertex_indices)
+            loop_layout_indices.extend(layout_indices)
+            loop_totals.append(len(layout_indices))
+
+        self._loop_layout_indices = np.array(loop_layout_indices, dtype=np.int64)
+        loop_totals = np.array(loop_totals, dtype=np.int32)
+        loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+        np.cumsum(loop_totals[:-1], out=loop_starts[1:])
+
+        mesh.loops.add(len(self._loop_layout_indices))
+        mesh.loops.foreach_set('vertex_index', self._layout_vertex_indices[self._loop_layout_indices].astype(np.int32))
+        mesh.polygons.add(len(loop_totals))
+        mesh.polygons.foreach_set('loop_start', loop_starts)
+        mesh.update(calc_edges=True)
+
+    def set_smooth(self, mesh: bpy.types.Mesh):
         # smooth faces all faces
-        for face in bmesh_object.faces:
-            face.smooth = True
-
+        mesh.polygons.foreach_set('use_smooth', np.ones(len(mesh.polygons), dtype=bool))
 
     @staticmethod
     def init_uvs(mesh: bpy.types.Mesh):
@@ -329,47 +364,37 @@ class DNAImporter:
             uv_layer = mesh.uv_layers.new(name=UV_MAP_NAME)
         mesh.uv_layers.active = uv_layer
 
-    def set_mesh_uvs(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        u_values = self._dna_reader.getVertexTextureCoordinateUs(mesh_index)
-        v_values = self._dna_reader.getVertexTextureCoordinateVs(mesh_index)
-        uv_indices = self._dna_reader.getVertexLayoutTextureCoordinateIndices(mesh_index)
-        uv_layer = bmesh_object.loops.layers.uv.active
-
-        for face in bmesh_object.faces:
-            face_vert_indices = [v.index for v in face.verts]
-            dna_face_vert_indices = self._dna_reader.getFaceVertexLayoutIndices(mesh_index, face.index)
-            lookup = dict(zip(face_vert_indices, dna_face_vert_indices))
-            for loop in face.loops:
-                uv_index = uv_indices[lookup[loop.vert.index]]
-                loop[uv_layer].uv.x = u_values[uv_index]
-                loop[uv_layer].uv.y = v_values[uv_index]
+    def set_mesh_uvs(self, mesh_index: int, mesh: bpy.types.Mesh):
+        u_values = np.asarray(self._dna_reader.getVertexTextureCoordinateUs(mesh_index), dtype=np.float32)
+        v_values = np.asarray(self._dna_reader.getVertexTextureCoordinateVs(mesh_index), dtype=np.float32)
+        uv_indices = np.asarray(self._dna_reader.getVertexLayoutTextureCoordinateIndices(mesh_index), dtype=np.int64)
+
+        loop_uv_indices = uv_indices[self._loop_layout_indices]
+        uvs = np.column_stack((u_values[loop_uv_indices], v_values[loop_uv_indices]))
+        self.init_uvs(mesh)
+        mesh.uv_layers.active.data.foreach_set('uv', uvs.ravel()) # type: ignore
         
-    def set_vertex_colors(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
+    def set_vertex_colors(self, mesh_index: int, mesh: bpy.types.Mesh):
         vertex_color_indices, vertex_color_values = self.get_dna_vertex_colors(mesh_index)
         if not vertex_color_indices or not vertex_color_values:
             logger.debug(f"No vertex colors found for mesh index {mesh_index}. Skipping vertex color import.")
             return
         
-        bmesh_object.loops.layers.color.verify()
-        color_layer = bmesh_object.loops.layers.color.active
+        color_attribute = mesh.color_attributes.new(name='Col', type='BYTE_COLOR', domain='CORNER')
 
         if self._default_vertex_color_layout:
-            for vertex_index in self._dna_reader.getVertexLayoutPositionIndices(mesh_index):
-                vert = bmesh_object.verts[vertex_index]
-                for loop in vert.link_loops:
-                    value = vertex_color_values[vertex_color_indices[vertex_index]]
-                    loop[color_layer] = Vector(value)
+            loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+            mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+            colors = np.asarray(vertex_color_values, dtype=np.float32)[
+                np.asarray(vertex_color_indices, dtype=np.int64)[loop_vertex_indices]
+            ]
+            color_attribute.data.foreach_set('color_srgb', colors.ravel()) # type: ignore
 
-        
         # Todo: Implement the custom vertex color layout from exported JSON file
         # else:
-        #     for face in bmesh_object.faces:
-        #         face_vert_indices = [v.index for v in face.verts]
-        #         dna_face_vert_indices = self._dna_reader.getFaceVertexLayoutIndices(mesh_index, face.index)
-        #         lookup = dict(zip(face_vert_indices, dna_face_vert_indices))
-        #         for loop in face.loops:
-        #             vertex_color_index = vertex_color_indices[lookup[loop.vert.index]]
-        #             loop[color_layer] = Vector(vertex_color_values[vertex_color_index])
+        #     vertex_color_indices = np.asarray(vertex_color_indices, dtype=np.int64)[self._loop_layout_indices]
+        #     colors = np.asarray(vertex_color_values, dtype=np.float32)[vertex_color_indices]
+        #     color_attribute.data.foreach_set('color_srgb', colors.ravel())
 
     def create_mesh_object(self, lod_index: int, mesh_name: str) -> bpy.types.Object:
         name = f"{self._prefix}_{mesh_name}"
@@ -393,30 +418,19 @@ class DNAImporter:
         bpy.context.view_layer.objects.active = mesh_object  # type: ignore
         mesh_object.select_set(True)
         
-        # Initialize the UV map
-        self.init_uvs(mesh)
-        
-        # create an empty BMesh
-        bmesh_object = bmesh.new()
-
-        # fill it in from a Mesh
-        bmesh_object.from_mesh(mesh=mesh)
-
-        self.set_mesh_vertex_positions(mesh_index, bmesh_object)
-        self.set_mesh_face_layout(mesh_index, bmesh_object)
-        self.set_smooth(bmesh_object)
+        # build the mesh data directly from the DNA arrays
+        self.set_mesh_vertex_positions(mesh_index, mesh)
+        self.set_mesh_face_layout(mesh_index, mesh)
+        self.set_smooth(mesh)
 
         # Add vertex colors
         # Todo: See if we can import vertex colors on all LODs.
         if self._import_properties.import_vertex_colors and lod_index == 0 and self._component_type == 'head':
-            self.set_vertex_colors(mesh_index, bmesh_object)
+            self.set_vertex_colors(mesh_index, mesh)
         
         # Add UVs
-        self.set_mesh_uvs(mesh_index, bmesh_object)
-
-        # send the data back to the mesh and free the BMesh from memory
-        bmesh_object.to_mesh(mesh)
-        bmesh_object.free()
+        self.set_mesh_uvs(mesh_index, mesh)
+        mesh.update()
 
         # Add custom split normals
         # Todo: Implement the custom split normals import. Currently, not correctly implemented
@@ -432,6 +446,13 @@ class DNAImporter:
         # Rotate the mesh and apply to Z-up
         mesh_object.rotation_euler.x = math.radians(90)
         utilities.apply_transforms(mesh_object, rotation=True) # type: ignore
+
+        # remember the imported vertex positions so calibration can skip the mesh if it is not changed
+        set_fingerprints(
+            mesh=mesh,
+            file_path=self.source_dna_file,
+            vertices=get_fingerprint(get_vertex_positions(mesh.vertices))
+        )
         return mesh_object
     
     def create_rig_object(self) -> bpy.types.Object | None:
@@ -605,6 +626,8 @@ class DNAImporter:
 
     def run(self) -> tuple[bool, str]:
         errors = []
+        # the cached KD-trees may belong to meshes that this import replaces
+        utilities.clear_vertex_kd_trees()
         self.initialize_dna_data()
         
         if self._import_properties.import_bones:
@@ -1,18 +1,24 @@
 import os
 import bpy
 import math
+import hashlib
 import logging
+import numpy as np
 from pathlib import Path
-from mathutils import Vector, Matrix
+from collections import OrderedDict
+from mathutils import Matrix
 from typing import Literal, TYPE_CHECKING
 from ..constants import (
     ComponentType,
-    SHAPE_KEY_DELTA_THRESHOLD
+    SHAPE_KEY_DELTA_THRESHOLD,
+    SHAPE_KEY_CACHE_FOLDER,
+    SHAPE_KEY_CACHE_MAX_SIZE,
+    DNA_READER_CACHE_MAX_SIZE,
+    FINGERPRINTS_PROPERTY_NAME
 )
 from ..utilities import (
     exclude_rig_logic_evaluation, 
-    switch_to_object_mode,
-    update_mesh
+    switch_to_object_mode
 )
 
 if TYPE_CHECKING:
@@ -20,6 +26,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_file_hashes = {}
+_dna_reader_cache = OrderedDict()
+
 FileFormat = Literal['binary', 'json']
 DataLayer = Literal[
     'Descriptor', 
@@ -27,11 +36,86 @@ DataLayer = Literal[
     'Behavior',
     'Geometry',
     'GeometryWithoutBlendShapes',
+    'MachineLearnedBehavior',
+    'RBFBehavior',
+    'JointBehaviorMetadata',
+    'TwistSwingBehavior',
     'AllWithoutBlendShapes',
     'All',
 ]
 
+# the parts of the DNA that are loaded by each data layer
+DATA_LAYER_CONTENTS = {
+    'Descriptor': {'Descriptor'},
+    'Definition': {'Descriptor', 'Definition'},
+    'Behavior': {'Descriptor', 'Definition', 'Behavior'},
+    'Geometry': {'Descriptor', 'Definition', 'Geometry', 'BlendShapes'},
+    'GeometryWithoutBlendShapes': {'Descriptor', 'Definition', 'Geometry'},
+    'MachineLearnedBehavior': {'Descriptor', 'Definition', 'MachineLearnedBehavior'},
+    'RBFBehavior': {'Descriptor', 'Definition', 'Behavior', 'RBFBehavior'},
+    'JointBehaviorMetadata': {'Descriptor', 'Definition', 'JointBehaviorMetadata'},
+    'TwistSwingBehavior': {'Descriptor', 'Definition', 'TwistSwingBehavior'},
+    'AllWithoutBlendShapes': {
+        'Descriptor', 'Definition', 'Behavior', 'Geometry', 'MachineLearnedBehavior', 
+        'RBFBehavior', 'JointBehaviorMetadata', 'TwistSwingBehavior'
+    },
+    'All': {
+        'Descriptor', 'Definition', 'Behavior', 'Geometry', 'BlendShapes', 'MachineLearnedBehavior', 
+        'RBFBehavior', 'JointBehaviorMetadata', 'TwistSwingBehavior'
+    },
+}
+
 def get_dna_reader(
+        file_path: Path,
+        file_format: FileFormat = 'binary',
+        data_layer: DataLayer = 'All',
+        memory_resource: 'riglogic.MemoryResource| None' = None,
+        use_cache: bool = True
+    ) -> 'riglogic.BinaryStreamReader':
+    """
+    Gets a reader for the DNA file. Readers are cached for the process by file path, modification 
+    time, size and data layer, and a cached reader that loaded a wider data layer is reused for a 
+    narrower one. The least recently used readers are dropped from the cache once the total size 
+    of their files exceeds DNA_READER_CACHE_MAX_SIZE.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"File '{file_path}' does not exist.")
+    
+    # readers using a custom memory resource are not shared
+    if not use_cache or memory_resource is not None:
+        return read_dna(file_path, file_format, data_layer, memory_resource)
+
+    stat = file_path.stat()
+    file_key = (str(file_path.absolute()), file_format.lower(), stat.st_mtime_ns, stat.st_size)
+    for key, (reader, _) in _dna_reader_cache.items():
+        if key[:-1] == file_key and DATA_LAYER_CONTENTS[data_layer] <= DATA_LAYER_CONTENTS[key[-1]]:
+            _dna_reader_cache.move_to_end(key)
+            return reader
+        
+    reader = read_dna(file_path, file_format, data_layer, memory_resource)
+    if reader is None:
+        return reader
+
+    # remove the readers of older versions of the file and the readers this one can replace
+    for key in list(_dna_reader_cache.keys()):
+        if key[0] == file_key[0] and (
+            key[:-1] != file_key or 
+            DATA_LAYER_CONTENTS[key[-1]] <= DATA_LAYER_CONTENTS[data_layer]
+        ):
+            del _dna_reader_cache[key]
+
+    _dna_reader_cache[(*file_key, data_layer)] = (reader, stat.st_size)
+    # evict the least recently used readers until the cache fits in memory
+    while len(_dna_reader_cache) > 1 and sum(size for _, size in _dna_reader_cache.values()) > DNA_READER_CACHE_MAX_SIZE:
+        _dna_reader_cache.popitem(last=False)
+
+    return reader
+
+def clear_dna_reader_cache():
+    _dna_reader_cache.clear()
+
+def read_dna(
         file_path: Path,
         file_format: FileFormat = 'binary',
         data_layer: DataLayer = 'All',
@@ -128,6 +212,192 @@ def get_dna_component_type(file_path: Path) -> ComponentType | None:
                 component_type = 'body'
     return component_type
 
+def get_file_hash(file_path: Path) -> str:
+    """
+    Gets the hash of the file contents. The hash is remembered until the file is modified.
+    """
+    file_path = Path(file_path)
+    stat = file_path.stat()
+    key = (str(file_path.absolute()), stat.st_mtime_ns, stat.st_size)
+    if key not in _file_hashes:
+        file_hash = hashlib.sha1()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                file_hash.update(chunk)
+        _file_hashes[key] = file_hash.hexdigest()
+    return _file_hashes[key]
+
+def get_vertex_positions(collection: bpy.types.bpy_prop_collection) -> np.ndarray:
+    """
+    Gets the positions of mesh vertices or shape key block data as a (N, 3) array.
+    """
+    positions = np.empty(len(collection) * 3, dtype=np.float32)
+    collection.foreach_get('co', positions)
+    return positions.reshape(-1, 3)
+
+def get_fingerprint(positions: np.ndarray) -> str:
+    """
+    Gets a hash of the vertex positions, so they can be compared to what they were when imported.
+    """
+    return hashlib.sha1(np.ascontiguousarray(positions, dtype=np.float32).tobytes()).hexdigest()
+
+def get_fingerprints(mesh: bpy.types.Mesh, file_path: Path) -> dict:
+    """
+    Gets the fingerprints that were stored on the mesh when it was imported. These are only 
+    returned if they were imported from a DNA file with the same contents.
+    """
+    fingerprints = mesh.get(FINGERPRINTS_PROPERTY_NAME)
+    file_path = Path(file_path)
+    if not fingerprints or not file_path.exists():
+        return {}
+    if fingerprints.get('dna_file_hash') != get_file_hash(file_path):
+        return {}
+    return fingerprints.to_dict()
+
+def set_fingerprints(
+        mesh: bpy.types.Mesh,
+        file_path: Path,
+        vertices: str | None = None,
+        basis: str | None = None,
+        shape_keys: dict[str, str] | None = None
+    ):
+    """
+    Stores the fingerprints of the imported mesh data on the mesh, along with the hash of the DNA 
+    file they were imported from. Fingerprints from a different DNA file are replaced.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return
+    
+    dna_file_hash = get_file_hash(file_path)
+    fingerprints = mesh.get(FINGERPRINTS_PROPERTY_NAME)
+    if not fingerprints or fingerprints.get('dna_file_hash') != dna_file_hash:
+        mesh[FINGERPRINTS_PROPERTY_NAME] = {'dna_file_hash': dna_file_hash, 'shape_keys': {}}
+        fingerprints = mesh[FINGERPRINTS_PROPERTY_NAME]
+
+    if vertices is not None:
+        fingerprints['vertices'] = vertices
+    if basis is not None:
+        fingerprints['basis'] = basis
+    if shape_keys:
+        fingerprints['shape_keys'].update(shape_keys)
+
+def read_blend_shape_target_deltas(
+        reader: 'riglogic.BinaryStreamReader',
+        mesh_index: int
+    ) -> dict[str, np.ndarray]:
+    """
+    Reads the sparse deltas of all the blend shape targets on the mesh. The vertex indices and 
+    deltas of target i are the rows offsets[i] to offsets[i + 1].
+    """
+    vertex_indices = []
+    deltas = []
+    offsets = [0]
+    for index in range(reader.getBlendShapeTargetCount(mesh_index)):
+        target_vertex_indices = reader.getBlendShapeTargetVertexIndices(mesh_index, index)
+        vertex_indices.append(np.asarray(target_vertex_indices, dtype=np.int32))
+        deltas.append(np.column_stack((
+            reader.getBlendShapeTargetDeltaXs(mesh_index, index),
+            reader.getBlendShapeTargetDeltaYs(mesh_index, index),
+            reader.getBlendShapeTargetDeltaZs(mesh_index, index)
+        )).astype(np.float32).reshape(-1, 3))
+        offsets.append(offsets[-1] + len(target_vertex_indices))
+
+    return {
+        'offsets': np.array(offsets, dtype=np.int64),
+        'vertex_indices': np.concatenate(vertex_indices) if vertex_indices else np.empty(0, dtype=np.int32),
+        'deltas': np.concatenate(deltas) if deltas else np.empty((0, 3), dtype=np.float32)
+    }
+
+def evict_cache_files(cache_folder: Path, max_size: int, keep: list[Path] | None = None):
+    """
+    Deletes the least recently used cache files until the folder is under the max size in bytes. 
+    The files to keep are never deleted, even if they alone exceed the max size.
+    """
+    keep_files = {Path(cache_file).absolute() for cache_file in keep or []}
+    cache_files = sorted(
+        cache_folder.glob('*.npy'), 
+        key=lambda cache_file: cache_file.stat().st_mtime, 
+        reverse=True
+    )
+    total_size = sum(cache_file.stat().st_size for cache_file in cache_files if cache_file.absolute() in keep_files)
+    for cache_file in cache_files:
+        if cache_file.absolute() in keep_files:
+            continue
+        total_size += cache_file.stat().st_size
+        if total_size > max_size:
+            logger.debug(f'Removing shape key cache file "{cache_file}"')
+            try:
+                cache_file.unlink(missing_ok=True)
+            except OSError as error:
+                # the file can still be memory mapped on some platforms
+                logger.debug(f'Failed to remove the shape key cache file "{cache_file}": {error}')
+
+def get_blend_shape_target_deltas(
+        reader: 'riglogic.BinaryStreamReader',
+        mesh_index: int,
+        file_path: Path | None = None,
+        cache_folder: Path = SHAPE_KEY_CACHE_FOLDER,
+        max_cache_size: int = SHAPE_KEY_CACHE_MAX_SIZE
+    ) -> dict[str, np.ndarray]:
+    """
+    Gets the sparse deltas of all the blend shape targets on the mesh. When the DNA file path 
+    is given, the deltas of all the meshes in the same LOD are cached on disk as .npy files, keyed 
+    by the hash of the DNA file. Importing the same DNA again memory maps them read-only instead 
+    of reading them from the DNA.
+    """
+    if not file_path:
+        return read_blend_shape_target_deltas(reader, mesh_index)
+
+    lod_index = next(
+        (index for index in range(reader.getLODCount()) if mesh_index in reader.getMeshIndicesForLOD(index)), 
+        0
+    )
+    cache_folder = Path(cache_folder)
+    prefix = f'{get_file_hash(file_path)}_lod{lod_index}'
+    names = ('offsets', 'vertex_indices', 'deltas')
+
+    cache_files = {name: cache_folder / f'{prefix}_mesh{mesh_index}_{name}.npy' for name in names}
+    if all(cache_file.exists() for cache_file in cache_files.values()):
+        try:
+            target_deltas = {name: np.load(cache_file, mmap_mode='r') for name, cache_file in cache_files.items()}
+            # mark the cache files as recently used
+            for cache_file in cache_files.values():
+                os.utime(cache_file)
+            return target_deltas
+        except (OSError, ValueError) as error:
+            logger.warning(f'Failed to read the shape key cache files "{prefix}_mesh{mesh_index}": {error}')
+
+    # cache the deltas of all the meshes in the lod, since they are imported together
+    mesh_indices = list(reader.getMeshIndicesForLOD(lod_index))
+    if mesh_index not in mesh_indices:
+        mesh_indices.append(mesh_index)
+
+    target_deltas = {}
+    written_files = []
+    for index in mesh_indices:
+        arrays = read_blend_shape_target_deltas(reader, index)
+        if index == mesh_index:
+            target_deltas = arrays
+        
+        try:
+            os.makedirs(cache_folder, exist_ok=True)
+            for name, value in arrays.items():
+                cache_file = cache_folder / f'{prefix}_mesh{index}_{name}.npy'
+                # write to a temporary file first so a partially written cache file is never read
+                temporary_file = cache_file.with_name(f'{cache_file.stem}.{os.getpid()}.tmp')
+                with open(temporary_file, 'wb') as file:
+                    np.save(file, value)
+                os.replace(temporary_file, cache_file)
+                written_files.append(cache_file)
+        except OSError as error:
+            logger.warning(f'Failed to write the shape key cache files "{prefix}_mesh{index}": {error}')
+
+    if written_files:
+        evict_cache_files(cache_folder, max_cache_size, keep=written_files)
+
+    return target_deltas
+
 @exclude_rig_logic_evaluation
 def create_shape_key(
         index: int,
@@ -138,8 +408,17 @@ def create_shape_key(
         prefix: str = '',
         is_neutral: bool = False,
         linear_modifier: float = 1.0,
-        delta_threshold: float = SHAPE_KEY_DELTA_THRESHOLD
+        delta_threshold: float = SHAPE_KEY_DELTA_THRESHOLD,
+        vertex_indices: np.ndarray | None = None,
+        deltas: np.ndarray | None = None,
+        file_path: Path | None = None
     ) -> bpy.types.ShapeKey | None:
+    """
+    Creates a shape key on the mesh from the blend shape target in the DNA. The target's vertex 
+    indices and deltas can be given when they were already read, otherwise they are read from the DNA.
+    If the DNA file path is given, the fingerprints of the basis and new shape key are stored on the 
+    mesh so calibration can skip the shape key if it is not changed.
+    """
     if not mesh_object:
         logger.error(f"Mesh object not found for shape key {name}. Skipping creation.")
         return
@@ -149,7 +428,9 @@ def create_shape_key(
     logger.info(f"Creating shape key {name}")
     shape_key_name = f'{prefix}{name}'
     
-    switch_to_object_mode()
+    # shape keys can't be edited in edit mode
+    if mesh_object.mode == 'EDIT':
+        switch_to_object_mode()
     shape_key = mesh_object.data.shape_keys.key_blocks.get(shape_key_name) # type: ignore
     if shape_key:
         shape_key.lock_shape = False
@@ -160,26 +441,47 @@ def create_shape_key(
     # Import the deltas if the shape key is not supposed to be neutral
     if not is_neutral:
         # DNA is Y-up, Blender is Z-up, so we need to rotate the deltas
-        rotation_matrix = Matrix.Rotation(math.radians(90), 4, 'X')
+        rotation_matrix = np.array(Matrix.Rotation(math.radians(90), 3, 'X'))
+
+        if vertex_indices is None or deltas is None:
+            vertex_indices = reader.getBlendShapeTargetVertexIndices(mesh_index, index)
+            deltas = np.column_stack((
+                reader.getBlendShapeTargetDeltaXs(mesh_index, index),
+                reader.getBlendShapeTargetDeltaYs(mesh_index, index),
+                reader.getBlendShapeTargetDeltaZs(mesh_index, index)
+            ))
+        deltas = np.asarray(deltas, dtype=np.float64).reshape(-1, 3) * linear_modifier
+        vertex_indices = np.asarray(vertex_indices, dtype=np.int64)
 
-        delta_x_values = reader.getBlendShapeTargetDeltaXs(mesh_index, index)
-        delta_y_values = reader.getBlendShapeTargetDeltaYs(mesh_index, index)
-        delta_z_values = reader.getBlendShapeTargetDeltaZs(mesh_index, index)
-        vertex_indices = reader.getBlendShapeTargetVertexIndices(mesh_index, index)
+        vertex_count = len(mesh_object.data.vertices) # type: ignore
+        missing = vertex_indices >= vertex_count
+        if missing.any():
+            logger.warning(
+                f'{int(missing.sum())} vertex indices are missing for shape key "{name}". '
+                f'Were these deleted on the base mesh "{mesh_object.name}"?'
+            )
+            vertex_indices = vertex_indices[~missing]
+            deltas = deltas[~missing]
 
         # the new vertex layout is the original vertex layout with the deltas from the dna applied
-        for vertex_index, delta_x, delta_y, delta_z in zip(vertex_indices, delta_x_values, delta_y_values, delta_z_values):
-            try:
-                delta = Vector((delta_x, delta_y, delta_z)) * linear_modifier
-                rotated_delta = rotation_matrix @ delta
-                
-                # set the positions of the shape key vertices
-                shape_key_block.data[vertex_index].co = mesh_object.data.vertices[vertex_index].co.copy() + rotated_delta # type: ignore
-            except IndexError:
-                logger.warning(f'Vertex index {vertex_index} is missing for shape key "{name}". Was this deleted on the base mesh "{mesh_object.name}"?')
+        vertex_positions = np.empty(vertex_count * 3, dtype=np.float32)
+        mesh_object.data.vertices.foreach_get('co', vertex_positions) # type: ignore
+        shape_key_positions = np.empty(vertex_count * 3, dtype=np.float32)
+        shape_key_block.data.foreach_get('co', shape_key_positions)
 
-    shape_key_block.lock_shape = True
+        shape_key_positions = shape_key_positions.reshape(-1, 3)
+        shape_key_positions[vertex_indices] = vertex_positions.reshape(-1, 3)[vertex_indices] + deltas @ rotation_matrix.T
+        shape_key_block.data.foreach_set('co', shape_key_positions.ravel())
 
-    update_mesh(mesh_object)
+        if file_path:
+            set_fingerprints(
+                mesh=mesh_object.data, # type: ignore
+                file_path=file_path,
+                basis=get_fingerprint(vertex_positions),
+                shape_keys={shape_key_name: get_fingerprint(shape_key_positions)}
+            )
+
+    shape_key_block.lock_shape = True
+    mesh_object.data.update_tag() # type: ignore
 
     return shape_key_block
\ No newline at end of file
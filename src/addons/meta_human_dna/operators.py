@@ -1,6 +1,7 @@
 import os
 import bpy
 import math
+import time
 import queue
 import shutil
 import logging
@@ -48,6 +49,18 @@ class GenericProgressQueueOperator(bpy.types.Operator):
     _commands_queue = queue.Queue()
     _commands_queue_size = 0
 
+    time_budget: bpy.props.IntProperty(
+        name="Time Budget",
+        default=50,
+        min=1,
+        description="The time in milliseconds to spend running queued commands before the interface is updated"
+    ) # type: ignore
+    fast: bpy.props.BoolProperty(
+        name="Fast",
+        default=False,
+        description="Runs all the queued commands at once without updating the interface in between. Useful for non-interactive runs"
+    ) # type: ignore
+
     def modal(self, context, event):
         if event.type == 'ESC':
             return self.finish(context)
@@ -57,25 +70,38 @@ class GenericProgressQueueOperator(bpy.types.Operator):
             if self._commands_queue.empty():
                 return self.finish(context)
             
+            self.run_commands(context, time_budget=self.time_budget / 1000)
+                
+        return {'PASS_THROUGH'}
+
+    def run_commands(self, context, time_budget: float | None = None):
+        """
+        Runs queued commands until the queue is empty or the time budget in seconds is used up, 
+        then reports the progress once for all the commands that ran.
+        """
+        start_time = time.perf_counter()
+        description = None
+        while not self._commands_queue.empty():
             index, mesh_index, description, kwargs_callback, callback = self._commands_queue.get() # type: ignore
-            new_size = self._commands_queue.qsize()
 
             # calculate the kwargs
             kwargs = kwargs_callback(index, mesh_index)
             # inject the kwargs into the description
             description = description.format(**kwargs)
+            callback(**kwargs)
+
+            if time_budget is not None and time.perf_counter() - start_time >= time_budget:
+                break
+
+        if description is not None:
+            new_size = self._commands_queue.qsize()
             context.window_manager.meta_human_dna.progress = (self._commands_queue_size-new_size)/self._commands_queue_size # type: ignore
             context.window_manager.meta_human_dna.progress_description = description # type: ignore
-            callback(**kwargs)
-                
-        return {'PASS_THROUGH'}
 
     def execute(self, context):
         if not self.validate(context):
             return {'CANCELLED'}
         
-        self._timer = context.window_manager.event_timer_add(0.01, window=context.window) # type: ignore
-        context.window_manager.modal_handler_add(self) # type: ignore
         head = utilities.get_active_head()
         if head:
             context.window_manager.meta_human_dna.progress = 0 # type: ignore
@@ -83,12 +109,22 @@ class GenericProgressQueueOperator(bpy.types.Operator):
             self._commands_queue = queue.Queue()
             self.set_commands_queue(context, head, self._commands_queue)
             self._commands_queue_size = self._commands_queue.qsize()
+
+            # timers don't run in background mode, so the queue is drained right away
+            if self.fast or bpy.app.background:
+                self.run_commands(context)
+                return self.finish(context)
+
+            self._timer = context.window_manager.event_timer_add(0.01, window=context.window) # type: ignore
+            context.window_manager.modal_handler_add(self) # type: ignore
             return {'RUNNING_MODAL'}
         return {'CANCELLED'}
 
 
     def finish(self, context):
-        context.window_manager.event_timer_remove(self._timer) # type: ignore
+        if self._timer:
+            context.window_manager.event_timer_remove(self._timer) # type: ignore
+            self._timer = None
         context.window_manager.meta_human_dna.progress = 1 # type: ignore
         # re-initialize the rig logic instance so the shape key blocks collection is updated for the UI
         instance = callbacks.get_active_rig_logic()
@@ -198,6 +234,11 @@ class BakeAnimation(bpy.types.Operator):
         default=True,
         description="Bakes the scale of the bones"
     ) # type: ignore
+    fast: bpy.props.BoolProperty(
+        name="Fast",
+        default=True,
+        description="Evaluates rig logic for all frames first, then writes the keyframes directly instead of baking the visual transforms of each frame"
+    ) # type: ignore
 
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self, width = 250) # type: ignore
@@ -214,6 +255,8 @@ class BakeAnimation(bpy.types.Operator):
         row = self.layout.row()
         row.prop(self, 'step')
         row = self.layout.row()
+        row.prop(self, 'fast')
+        row = self.layout.row()
         row.prop(self, 'shape_keys')
         row = self.layout.row()
         row.prop(self, 'masks')
@@ -250,7 +293,8 @@ class BakeAnimation(bpy.types.Operator):
                 channel_types=channel_types,
                 clean_curves=self.clean_curves,
                 masks=self.masks,
-                shape_keys=self.shape_keys   
+                shape_keys=self.shape_keys,
+                fast=self.fast
             )
         return {'FINISHED'}
     
@@ -1696,6 +1740,8 @@ class UILIST_RIG_LOGIC_OT_entry_remove(GenericUIListOperator, bpy.types.Operator
                 if collection:
                     bpy.data.collections.remove(collection, do_unlink=True)
 
+        # free the rig logic data of the instance
+        instance.destroy()
         my_list.remove(self.active_index)
         to_index = min(self.active_index, len(my_list) - 1)
         context.scene.meta_human_dna.rig_logic_instance_list_active_index = to_index # type: ignore
@@ -197,6 +197,15 @@ class MetahumanSceneProperties(bpy.types.PropertyGroup):
     rig_logic_instance_list_active_index: bpy.props.IntProperty(
         update=callbacks.update_head_output_items
     ) # type: ignore
+    parallel_evaluation: bpy.props.BoolProperty(
+        name="Parallel Evaluation",
+        description=(
+            "Calculates rig logic for multiple instances at the same time on separate threads, then applies the results "
+            "to the scene. This is experimental, instances with the same DNA share a rig logic manager that is then "
+            "called from several threads"
+        ),
+        default=False
+    ) # type: ignore
 
 
 def register():
@@ -1,91 +1,191 @@
+import os
 import bpy
 import math
 import logging
+import numpy as np
 from pprint import pformat
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from mathutils import Matrix, Vector, Euler, Quaternion
 from . import utilities
 from .ui import callbacks
 from typing import TYPE_CHECKING, Literal
+from collections.abc import Callable
 from .constants import (
     SCALE_FACTOR, 
     SHAPE_KEY_NAME_MAX_LENGTH,
-    RBF_SOLVER_POSTFIX
+    BASE_POSITION_ATTRIBUTE_NAME,
+    RBF_SOLVER_POSTFIX,
+    RIG_LOGIC_OUTPUT_DELTA_THRESHOLD,
+    ComponentType
 )
 
 if TYPE_CHECKING:
     from .bindings import riglogic
+    from .dna_io.misc import DataLayer
 
 MEMORY_RESOURCE_SIZE = 1024 * 1024 * 4  # 4MB
 MEMORY_RESOURCE_ALIGNMENT = 16
 
 logger = logging.getLogger(__name__)
 
+_thread_pool: ThreadPoolExecutor | None = None
+_listener_index = {}
+_rig_logic_managers = {}
+
 
 def rig_logic_listener(scene, dependency_graph):
     # this condition prevents constant evaluation
     if not bpy.context.window_manager.meta_human_dna.evaluate_dependency_graph: # type: ignore
         return
 
-    # track the minimal set of instances that need to be updated and their components
+    instances = scene.meta_human_dna.rig_logic_instance_list
+    # track the minimal set of instance indices that need to be updated and their components
     instance_updates = set()
 
     # TODO: Investigate if this is needed and if there is a better way to do this
     # if the screen is the temp screen, then is is rendering and we need to evaluate
     if bpy.context.screen and 'temp' in bpy.context.screen.name.lower(): # type: ignore
-        for instance in scene.meta_human_dna.rig_logic_instance_list:
+        for index, instance in enumerate(instances):
             if instance.auto_evaluate:
-                instance_updates.add((instance, 'all'))
+                instance_updates.add((index, 'all'))
 
     # only evaluate if in pose mode or if animation is
     if bpy.context.mode == 'POSE' or (bpy.context.screen and bpy.context.screen.is_animation_playing): # type: ignore
+        listener_index = get_listener_index(scene)
         for update in dependency_graph.updates:
             data_type = update.id.bl_rna.name
-            if data_type == 'Action':
-                for instance in scene.meta_human_dna.rig_logic_instance_list: # type: ignore
-                    if not instance.auto_evaluate:
-                        continue
-                    # Check if the action is being used by any face board
-                    if (
-                        instance.face_board and 
-                        instance.face_board.animation_data and 
-                        instance.face_board.animation_data.action and 
-                        instance.face_board.animation_data.action.name == update.id.name
-                    ):
-                        instance_updates.add((instance, 'head'))
-                    # Check if the action is being used by any body rig
-                    elif (
-                        instance.body_rig and 
-                        instance.body_rig.animation_data and 
-                        instance.body_rig.animation_data.action and 
-                        instance.body_rig.animation_data.action.name == update.id.name
-                    ):
-                        instance_updates.add((instance, 'body'))
-                    # Otherwise, evaluate all instances. 
-                    # Todo: Not ideal, so we should probably provide a way for user to specify another armature that might have
-                    # the action and be evaluated.
-                    else:
-                        instance_updates.add((instance, 'all'))
-
-            elif data_type == 'Armature':
-                if update.is_updated_transform:
-                    for instance in scene.meta_human_dna.rig_logic_instance_list:
-                        if not instance.auto_evaluate:
-                            continue
-
-                        armature_name = update.id.name.split('.')[0]
-                        
-                        # Check if the armature is the face board
-                        if instance.face_board and instance.face_board.name.endswith(armature_name):
-                            instance_updates.add((instance, 'head'))
-                        elif instance.body_rig and instance.body_rig.name.endswith(armature_name):
-                            instance_updates.add((instance, 'body'))
+            if data_type == 'Action' or (data_type == 'Armature' and update.is_updated_transform):
+                # actions and armatures that don't drive a face board or body rig are ignored
+                instance_updates.update(listener_index.get(update.id.original.as_pointer(), ()))
 
     # apply the updates to the instances
+    evaluate_instances(
+        instance_updates={(instances[index], component) for index, component in instance_updates}, 
+        parallel=scene.meta_human_dna.parallel_evaluation # type: ignore
+    )
+
+def get_listener_index(scene: bpy.types.Scene) -> dict[int, list[tuple[int, str]]]:
+    """
+    Gets a lookup from the pointers of the face board and body rig armatures and their actions 
+    to the index of the rig logic instance and the component they drive. The lookup is only 
+    rebuilt when the instances or the data they point to change.
+    """
+    items = []
+    for index, instance in enumerate(scene.meta_human_dna.rig_logic_instance_list): # type: ignore
+        if not instance.auto_evaluate:
+            continue
+        for armature_object, component in ((instance.face_board, 'head'), (instance.body_rig, 'body')):
+            if not armature_object:
+                continue
+            items.append((armature_object.data.as_pointer(), index, component))
+            if armature_object.animation_data and armature_object.animation_data.action:
+                items.append((armature_object.animation_data.action.as_pointer(), index, component))
+
+    key = (scene.as_pointer(), tuple(items))
+    if _listener_index.get('key') != key:
+        lookup = {}
+        for pointer, index, component in items:
+            lookup.setdefault(pointer, []).append((index, component))
+        _listener_index['key'] = key
+        _listener_index['lookup'] = lookup
+
+    return _listener_index['lookup']
+
+def evaluate_instances(
+        instance_updates: set[tuple['RigLogicInstance', Literal['head', 'body', 'all']]],
+        parallel: bool = False
+    ):
+    """
+    Evaluates the given instances and components. In parallel mode the controls of all the 
+    instances are read first, then rig logic is calculated for all of them on a thread pool, 
+    and finally the outputs are applied back to the scene on the main thread.
+    """
+    if not parallel or len(instance_updates) < 2:
+        for instance, component in instance_updates:
+            instance.evaluate(component=component)
+        return
+    
+    window_manager_properties = bpy.context.window_manager.meta_human_dna # type: ignore
+    if not window_manager_properties.evaluate_dependency_graph:
+        return
+
+    # read the control values of all the instances from the scene
+    controls = {}
     for instance, component in instance_updates:
-        instance.evaluate(component=component)
+        for manager, rig_instance in instance.update_controls(component=component):
+            # the same rig instance can't be calculated on two threads at once
+            controls[id(rig_instance)] = (manager, rig_instance)
+
+    # turn off the dependency graph evaluation so we can update the outputs without triggering an update
+    window_manager_properties.evaluate_dependency_graph = False
+    try:
+        # the calculations are native code that doesn't touch blender data, so they can run concurrently
+        for future in [get_thread_pool().submit(calculate_rig_logic_controls, *item) for item in controls.values()]:
+            future.result()
+
+        for instance, component in instance_updates:
+            instance.apply_outputs(component=component)
+    finally:
+        window_manager_properties.evaluate_dependency_graph = True
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=os.cpu_count(), 
+            thread_name_prefix='meta_human_dna_rig_logic'
+        )
+    return _thread_pool
+
+def get_rig_logic_manager(
+        file_path: Path, 
+        data_layer: 'DataLayer' = 'All'
+    ) -> tuple['riglogic.BinaryStreamReader', 'riglogic.RigLogic']:
+    """
+    Gets the DNA reader and Rig Logic manager for the DNA file. These are shared by every instance 
+    whose DNA file has the same contents, so each instance only needs its own RigInstance. The 
+    data layer must include every part of the DNA that Rig Logic evaluates for the rig.
+    """
+    from .bindings import riglogic
+    from .dna_io import get_dna_reader
+    from .dna_io.misc import get_file_hash
+
+    # duplicated instances have their own copy of the DNA file, so key on the contents not the path
+    key = (get_file_hash(file_path), data_layer)
+    if key not in _rig_logic_managers:
+        reader = get_dna_reader(
+            file_path=file_path,
+            data_layer=data_layer,
+            memory_resource=None
+        )
+        manager = riglogic.RigLogic.create(
+            reader=reader,
+            config=riglogic.Configuration(),
+            memRes=None
+        )
+        _rig_logic_managers[key] = (reader, manager)
+    return _rig_logic_managers[key]
+
+def release_rig_logic_managers():
+    """
+    Removes the shared Rig Logic managers that are no longer used by any instance.
+    """
+    used_managers = {
+        id(data.get(key)) 
+        for data in RigLogicInstance.instance_data.values()
+        for key in ('head_manager', 'body_manager')
+    }
+    for key, (_, manager) in list(_rig_logic_managers.items()):
+        if id(manager) not in used_managers:
+            del _rig_logic_managers[key]
 
 def stop_listening():
+    global _thread_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=True)
+        _thread_pool = None
+
     for handler in bpy.app.handlers.depsgraph_update_post:
         if handler.__name__ == rig_logic_listener.__name__:
             bpy.app.handlers.depsgraph_update_post.remove(handler)
@@ -101,6 +201,324 @@ def start_listening():
     bpy.app.handlers.depsgraph_update_post.append(rig_logic_listener) # type: ignore
     bpy.app.handlers.frame_change_post.append(rig_logic_listener) # type: ignore
 
+def calculate_rig_logic_controls(
+        manager: 'riglogic.RigLogic',
+        rig_instance: 'riglogic.RigInstance'
+    ):
+    # map the GUI changes to the raw controls
+    manager.mapGUIToRawControls(rig_instance)
+    # calculate the controls
+    manager.calculate(rig_instance)
+
+def get_joint_lookup(
+        dna_reader: 'riglogic.BinaryStreamReader',
+        rig_object: bpy.types.Object,
+        rest_pose: dict[str, tuple[Vector, Euler, Vector, Matrix]],
+        include: Callable[[str], bool]
+    ) -> dict[str, np.ndarray]:
+    """
+    Resolves the DNA joints to the pose bones on the rig once, so the raw joint outputs can be 
+    applied as arrays instead of looking up each bone by name every evaluation.
+    """
+    pose_bone_indices = {pose_bone.name: index for index, pose_bone in enumerate(rig_object.pose.bones)}
+
+    joint_indices = []
+    bone_indices = []
+    rest_locations = []
+    rest_rotations = []
+    rest_scales = []
+    inverted_rest_to_parent_matrices = []
+    has_children = []
+    missing_bones = []
+
+    for joint_index in range(dna_reader.getJointCount()):
+        name = dna_reader.getJointName(joint_index)
+        if not include(name):
+            continue
+
+        bone_index = pose_bone_indices.get(name)
+        if bone_index is None or name not in rest_pose:
+            missing_bones.append(name)
+            continue
+
+        rest_location, rest_rotation, rest_scale, rest_to_parent_matrix = rest_pose[name]
+        joint_indices.append(joint_index)
+        bone_indices.append(bone_index)
+        rest_locations.append(rest_location[:])
+        rest_rotations.append(rest_rotation[:])
+        rest_scales.append(rest_scale[:])
+        inverted_rest_to_parent_matrices.append(rest_to_parent_matrix.inverted())
+        has_children.append(bool(rig_object.pose.bones[bone_index].children))
+
+    if missing_bones:
+        logger.warning(
+            f'The following bones were not found on "{rig_object.name}". Rig Logic will not update them:\n{pformat(missing_bones)}'
+        )
+
+    return {
+        'joint_indices': np.array(joint_indices, dtype=np.int64),
+        'pose_bone_indices': np.array(bone_indices, dtype=np.int64),
+        'rest_locations': np.array(rest_locations, dtype=np.float64).reshape(-1, 3),
+        'rest_rotations': np.array(rest_rotations, dtype=np.float64).reshape(-1, 3),
+        'rest_scales': np.array(rest_scales, dtype=np.float64).reshape(-1, 3),
+        'inverted_rest_to_parent_matrices': np.array(inverted_rest_to_parent_matrices, dtype=np.float64).reshape(-1, 4, 4),
+        'has_children': np.array(has_children, dtype=bool),
+        'pose_bone_count': len(rig_object.pose.bones) # type: ignore
+    }
+
+def get_gui_control_lookup(
+        dna_reader: 'riglogic.BinaryStreamReader',
+        face_board: bpy.types.Object
+    ) -> dict[str, np.ndarray]:
+    """
+    Resolves the GUI controls in the DNA to the face board pose bones and location axis 
+    they are read from once, so the control values can be read in bulk every evaluation.
+    """
+    axis_lookup = {'x': 0, 'y': 1, 'z': 2}
+    pose_bone_indices = {pose_bone.name: index for index, pose_bone in enumerate(face_board.pose.bones)}
+
+    control_names = []
+    axes = []
+    gui_control_indices = []
+    bone_indices = []
+    missing_gui_controls = []
+
+    for index in range(dna_reader.getGUIControlCount()):
+        full_name = dna_reader.getGUIControlName(index)
+        control_name, axis = full_name.split('.')
+        axis = axis.rsplit('t',-1)[-1].lower()
+        control_names.append(control_name)
+        axes.append(axis_lookup[axis])
+
+        bone_index = pose_bone_indices.get(control_name)
+        if bone_index is not None:
+            gui_control_indices.append(index)
+            bone_indices.append(bone_index)
+        else:
+            missing_gui_controls.append(control_name)
+
+    if missing_gui_controls:
+        logger.warning(f'The following GUI controls are missing on "{face_board.name}":\n{pformat(missing_gui_controls)}.')
+        logger.warning(f'You are not listening to {len(missing_gui_controls)} GUI controls')
+        logger.warning('This is most likely due to the DNA file being an older version then what the face board currently supports.')
+        logger.warning('Using a new .dna file created from the latest version of MetaHuman Creator will probably resolve this.')
+
+    return {
+        'control_names': control_names, # type: ignore
+        'axes': np.array(axes, dtype=np.int64),
+        'gui_control_indices': np.array(gui_control_indices, dtype=np.int64),
+        'pose_bone_indices': np.array(bone_indices, dtype=np.int64),
+        'pose_bone_count': len(face_board.pose.bones), # type: ignore
+        'face_board_name': face_board.name # type: ignore
+    }
+
+def set_gui_control_values(
+        rig_instance: 'riglogic.RigInstance',
+        values: np.ndarray,
+        previous_values: np.ndarray | None = None
+    ):
+    """
+    Pushes the GUI control values to the rig instance. Only the values that changed since 
+    the previous values are set.
+    """
+    if previous_values is None or previous_values.shape != values.shape:
+        changed = np.arange(len(values))
+    else:
+        changed = np.flatnonzero(values != previous_values)
+
+    for index, value in zip(changed.tolist(), values[changed].tolist()):
+        rig_instance.setGUIControl(index, value)
+
+def get_changed_output_indices(
+        values: np.ndarray, 
+        history: dict,
+        key: str,
+        force: bool = False
+    ) -> np.ndarray:
+    """
+    Gets the indices of the outputs that differ from the previously applied outputs stored 
+    in the history under the given key. The history is updated with the changed values.
+    """
+    previous_values = history.get(key)
+    if force or previous_values is None or previous_values.shape != values.shape:
+        history[key] = values.copy()
+        return np.arange(len(values))
+    
+    difference = np.abs(values - previous_values) > RIG_LOGIC_OUTPUT_DELTA_THRESHOLD
+    changed = difference.reshape(len(values), -1).any(axis=1)
+    # only the changed values are remembered, so small changes can still accumulate past the threshold
+    previous_values[changed] = values[changed]
+    return np.flatnonzero(changed)
+
+def calculate_blend_shape_positions(
+        base_positions: np.ndarray,
+        blend_shape_outputs: np.ndarray,
+        channel_indices: np.ndarray,
+        vertex_indices: np.ndarray,
+        deltas: np.ndarray
+    ) -> np.ndarray:
+    """
+    Deforms the (vertices, 3) base positions by the sparse blend shape deltas. Each delta row 
+    moves the vertex in vertex_indices by the output of the blend shape channel in channel_indices, 
+    so only the deltas of the active channels are summed.
+    """
+    weights = np.clip(blend_shape_outputs, 0.0, 1.0)[channel_indices]
+    active = np.flatnonzero(weights)
+    positions = base_positions.copy()
+    if not len(active):
+        return positions
+    
+    vertex_indices = vertex_indices[active]
+    weighted_deltas = deltas[active] * weights[active, None]
+    for axis in range(3):
+        positions[:, axis] += np.bincount(
+            vertex_indices, 
+            weights=weighted_deltas[:, axis], 
+            minlength=len(positions)
+        )
+    return positions
+
+def get_pose_bone_transforms(
+        joint_lookup: dict[str, np.ndarray],
+        values: np.ndarray,
+        rows: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts raw joint output values into pose bone locations, euler rotations and scales. Each 
+    row of values belongs to the joint at the same row in the joint lookup.
+    """
+    # extract the delta values
+    location_deltas = values[:, 0:3] / SCALE_FACTOR
+    rotation_deltas = np.radians(values[:, 3:6])
+    scale_deltas = values[:, 6:9]
+
+    # update the transformations using the rest pose and the delta values
+    modified_matrices = utilities.compose_matrices(
+        joint_lookup['rest_locations'][rows] + location_deltas,
+        joint_lookup['rest_rotations'][rows] + rotation_deltas,
+        joint_lookup['rest_scales'][rows] + scale_deltas
+    )
+    matrix_basis = joint_lookup['inverted_rest_to_parent_matrices'][rows] @ modified_matrices
+    locations, rotations, scales = utilities.decompose_matrices(matrix_basis)
+
+    # if the bone is not a leaf bone, we need to update the rotation again
+    has_children = joint_lookup['has_children'][rows]
+    rotations[has_children] = rotation_deltas[has_children]
+    return locations, rotations, scales
+
+def apply_raw_joint_outputs(
+        rig_object: bpy.types.Object,
+        joint_lookup: dict[str, np.ndarray],
+        raw_joint_output,
+        force: bool = False
+    ):
+    """
+    Applies the raw joint outputs from rig logic to the pose bones in a single pass. The 
+    result is the same as setting the matrix_basis of each pose bone individually. Only the 
+    bones whose outputs changed since the last call are updated, unless forced.
+    """
+    if not len(joint_lookup['joint_indices']):
+        return
+
+    values = np.asarray(raw_joint_output, dtype=np.float64).reshape(-1, 9)[joint_lookup['joint_indices']]
+
+    changed = get_changed_output_indices(values, joint_lookup, 'previous_values', force)
+    # skip writing to the pose bones if nothing changed
+    if not len(changed):
+        return
+    locations, rotations, scales = get_pose_bone_transforms(joint_lookup, values[changed], changed)
+
+    # read the current transforms of all the pose bones, then write them back with the changed values
+    pose_bones = rig_object.pose.bones
+    bone_indices = joint_lookup['pose_bone_indices'][changed]
+    for attribute, new_values in (('location', locations), ('rotation_euler', rotations), ('scale', scales)):
+        current_values = np.empty(len(pose_bones) * 3, dtype=np.float32)
+        pose_bones.foreach_get(attribute, current_values)
+        current_values = current_values.reshape(-1, 3)
+        current_values[bone_indices] = new_values
+        pose_bones.foreach_set(attribute, current_values.ravel())
+
+    rig_object.update_tag(refresh={'OBJECT'})
+
+def get_action_gui_control_values(
+        action: bpy.types.Action,
+        gui_control_lookup: dict[str, np.ndarray],
+        frames: np.ndarray,
+        default_values: np.ndarray | None = None
+    ) -> np.ndarray:
+    """
+    Samples the GUI control values from the face board F-curves in the given action at each 
+    of the given frames. Controls without an F-curve keep their default value.
+    """
+    control_count = len(gui_control_lookup['axes'])
+    if default_values is None:
+        default_values = np.zeros(control_count, dtype=np.float32)
+    values = np.tile(np.asarray(default_values, dtype=np.float32), (len(frames), 1))
+
+    # map the face board location F-curves to the control name and axis they animate
+    fcurves = {}
+    for fcurve in action.fcurves:
+        if not fcurve.data_path.startswith('pose.bones["') or not fcurve.data_path.endswith('"].location'):
+            continue
+        control_name = fcurve.data_path[len('pose.bones["'):-len('"].location')]
+        fcurves[(control_name, fcurve.array_index)] = fcurve
+
+    for index, (control_name, axis) in enumerate(zip(gui_control_lookup['control_names'], gui_control_lookup['axes'].tolist())):
+        fcurve = fcurves.get((control_name, axis))
+        if fcurve:
+            values[:, index] = [fcurve.evaluate(frame) for frame in frames.tolist()]
+
+    return values
+
+def calculate_rig_logic_outputs(
+        manager: 'riglogic.RigLogic',
+        rig_instance: 'riglogic.RigInstance',
+        gui_control_values: np.ndarray,
+        lod: int = 0
+    ) -> dict[str, np.ndarray]:
+    """
+    Evaluates rig logic for each row of GUI control values without touching any scene data. 
+    Returns the raw joint outputs as a (frames, joints, 9) array, and the blend shape and 
+    animated map outputs as (frames, channels) and (frames, maps) arrays.
+    """
+    gui_control_values = np.atleast_2d(np.asarray(gui_control_values, dtype=np.float32))
+    frame_count = len(gui_control_values)
+
+    joint_outputs = np.empty((frame_count, 0, 9), dtype=np.float32)
+    blend_shape_outputs = np.empty((frame_count, 0), dtype=np.float32)
+    animated_map_outputs = np.empty((frame_count, 0), dtype=np.float32)
+
+    rig_instance.setLOD(level=lod)
+    previous_values = None
+    for frame_index, values in enumerate(gui_control_values):
+        set_gui_control_values(
+            rig_instance=rig_instance, 
+            values=values, 
+            previous_values=previous_values
+        )
+        previous_values = values
+        calculate_rig_logic_controls(manager, rig_instance)
+
+        raw_joint_outputs = np.asarray(rig_instance.getRawJointOutputs(), dtype=np.float32).reshape(-1, 9)
+        blend_shape_output = np.asarray(rig_instance.getBlendShapeOutputs(), dtype=np.float32)
+        animated_map_output = np.asarray(rig_instance.getAnimatedMapOutputs(), dtype=np.float32)
+
+        # the output sizes are only known after the first calculation
+        if frame_index == 0:
+            joint_outputs = np.empty((frame_count, *raw_joint_outputs.shape), dtype=np.float32)
+            blend_shape_outputs = np.empty((frame_count, len(blend_shape_output)), dtype=np.float32)
+            animated_map_outputs = np.empty((frame_count, len(animated_map_output)), dtype=np.float32)
+
+        joint_outputs[frame_index] = raw_joint_outputs
+        blend_shape_outputs[frame_index] = blend_shape_output
+        animated_map_outputs[frame_index] = animated_map_output
+
+    return {
+        'joint_outputs': joint_outputs,
+        'blend_shape_outputs': blend_shape_outputs,
+        'animated_map_outputs': animated_map_outputs
+    }
+
 
 class MaterialSlotToInstance(bpy.types.PropertyGroup):
     name: bpy.props.StringProperty(
@@ -181,6 +599,16 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         name='Evaluate Shape Keys',
         description='Whether to evaluate shape keys based on the face board controls'
     ) # type: ignore
+    shape_key_evaluation_mode: bpy.props.EnumProperty(
+        name='Shape Key Evaluation Mode',
+        items=[
+            ('shape_keys', 'Shape Keys', 'Sets the values of the shape keys on the head meshes'),
+            ('sparse_deltas', 'Sparse Deltas', 'Deforms the vertex positions of the head meshes directly with the blend shape deltas from the DNA file. The meshes need no shape keys. Switch back to shape keys to restore the neutral vertex positions before editing or exporting the meshes'),
+        ],
+        default='shape_keys',
+        description='Choose how the blend shape outputs of rig logic are applied to the head meshes',
+        update=callbacks.update_shape_key_evaluation_mode
+    ) # type: ignore
     evaluate_texture_masks: bpy.props.BoolProperty(
         default=True,
         name='Evaluate Texture Masks',
@@ -516,11 +944,17 @@ class RigLogicInstance(bpy.types.PropertyGroup):
     calibrate_meshes: bpy.props.BoolProperty(default=True) # type: ignore
     calibrate_shape_keys: bpy.props.BoolProperty(default=True) # type: ignore
 
-    # this holds the rig logic references
-    data = {}
+    # this holds the rig logic references for each instance by name
+    instance_data = {}
 
     warning_messages = []
     
+    @property
+    def data(self) -> dict:
+        # property group instances are new python objects every time they are accessed, so the 
+        # data is stored on the class for each instance name
+        return self.instance_data.setdefault(self.name, {})
+
     def get_shape_key(self, mesh_index: int) -> bpy.types.Key | None:
         shape_key = self.data.get('shape_key', {}).get(mesh_index)
         try:
@@ -595,6 +1029,31 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         self.data['head_mesh_index_lookup'] = mesh_index_lookup
         return self.data['head_mesh_index_lookup'] # type: ignore
 
+    @property
+    def head_mesh_blend_shape_channel_lookup(self) -> dict[int, list[int]]:
+        """
+        The blend shape channel indices of each lod 0 mesh. These are read from the mesh blend 
+        shape channel mapping in the definition layer, so the geometry does not need to be loaded.
+        """
+        if not self.head_dna_reader:
+            return {}
+        
+        mesh_blend_shape_channel_lookup = self.data.get('head_mesh_blend_shape_channel_lookup')
+        if mesh_blend_shape_channel_lookup is not None:
+            return mesh_blend_shape_channel_lookup
+        
+        mesh_blend_shape_channel_lookup = {
+            mesh_index: [] for mesh_index in self.head_dna_reader.getMeshIndicesForLOD(0)
+        }
+        for index in self.head_dna_reader.getMeshBlendShapeChannelMappingIndicesForLOD(0):
+            mapping = self.head_dna_reader.getMeshBlendShapeChannelMapping(index)
+            channel_indices = mesh_blend_shape_channel_lookup.get(mapping.meshIndex)
+            if channel_indices is not None:
+                channel_indices.append(mapping.blendShapeChannelIndex)
+
+        self.data['head_mesh_blend_shape_channel_lookup'] = mesh_blend_shape_channel_lookup
+        return self.data['head_mesh_blend_shape_channel_lookup']
+
     @property
     def head_channel_name_to_index_lookup(self) -> dict[str, int]:
         if not self.head_dna_reader:
@@ -604,10 +1063,9 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         if channel_name_to_index_lookup:
             return channel_name_to_index_lookup
         
-        for mesh_index in self.head_dna_reader.getMeshIndicesForLOD(0):
+        for mesh_index, channel_indices in self.head_mesh_blend_shape_channel_lookup.items():
             mesh_name = self.head_dna_reader.getMeshName(mesh_index)
-            for index in range(self.head_dna_reader.getBlendShapeTargetCount(mesh_index)):
-                channel_index = self.head_dna_reader.getBlendShapeChannelIndex(mesh_index, index)
+            for channel_index in channel_indices:
                 shape_key_name = self.head_dna_reader.getBlendShapeChannelName(channel_index)
                 channel_name_to_index_lookup[f'{mesh_name}__{shape_key_name}'] = channel_index
 
@@ -624,9 +1082,8 @@ class RigLogicInstance(bpy.types.PropertyGroup):
             return mesh_shape_key_index_lookup
         
         # build a lookup dictionary of shape key index to mesh index
-        for mesh_index in self.head_dna_reader.getMeshIndicesForLOD(0):
-            for index in range(self.head_dna_reader.getBlendShapeTargetCount(mesh_index)):
-                channel_index = self.head_dna_reader.getBlendShapeChannelIndex(mesh_index, index)
+        for mesh_index, channel_indices in self.head_mesh_blend_shape_channel_lookup.items():
+            for channel_index in channel_indices:
                 mesh_shape_key_index_lookup[channel_index] = mesh_index
         self.data['head_mesh_shape_key_index_lookup'] = mesh_shape_key_index_lookup
         return mesh_shape_key_index_lookup
@@ -668,14 +1125,13 @@ class RigLogicInstance(bpy.types.PropertyGroup):
 
             # Note: That lod 0 is the only lod that has shape keys
             failed_to_cache_count = 0
-            for mesh_index in self.head_dna_reader.getMeshIndicesForLOD(0):
+            for mesh_index, channel_indices in self.head_mesh_blend_shape_channel_lookup.items():
                 mesh_object = self.head_mesh_index_lookup.get(mesh_index)
                 if not mesh_object:
                     logger.warning(f'The mesh object for mesh index "{mesh_index}" was not found')
                     continue
 
-                for target_index in range(self.head_dna_reader.getBlendShapeTargetCount(mesh_index)):
-                    channel_index = self.head_dna_reader.getBlendShapeChannelIndex(mesh_index, target_index)
+                for channel_index in channel_indices:
                     name = self.head_dna_reader.getBlendShapeChannelName(channel_index)
                     dna_mesh_name = mesh_object.name.replace(f'{self.name}_', '')
                     shape_key_block_name = f'{dna_mesh_name}__{name}'
@@ -703,6 +1159,146 @@ class RigLogicInstance(bpy.types.PropertyGroup):
 
         return self.data['head_shape_key_blocks']
     
+    @property
+    def head_shape_key_lookup(self) -> list[dict]:
+        if not self.head_dna_reader:
+            return []
+
+        shape_key_lookup = self.data.get('head_shape_key_lookup')
+        if shape_key_lookup is not None:
+            try:
+                if all(tuple(item['shape_key'].key_blocks.keys()) == item['key_block_names'] for item in shape_key_lookup):
+                    return shape_key_lookup
+            except ReferenceError:
+                pass
+            # shape keys were added, removed, renamed or reordered since they were cached, so the key 
+            # block indices are stale and they need to be cached again
+            self.data.pop('head_shape_key_blocks', None)
+
+        # group the blend shape channels by the shape key they belong to, so their 
+        # values can be set on each shape key in bulk
+        grouped_items = {}
+        for channel_index, key_blocks in self.head_shape_key_blocks.items():
+            for key_block in key_blocks:
+                shape_key = key_block.id_data
+                item = grouped_items.get(shape_key.name)
+                if item is None:
+                    item = {
+                        'shape_key': shape_key,
+                        'key_block_names': tuple(shape_key.key_blocks.keys()),
+                        'key_block_name_to_index': {
+                            name: index for index, name in enumerate(shape_key.key_blocks.keys())
+                        },
+                        'channel_indices': [],
+                        'key_block_indices': [],
+                        'key_blocks': []
+                    }
+                    grouped_items[shape_key.name] = item
+
+                item['channel_indices'].append(channel_index)
+                item['key_block_indices'].append(item['key_block_name_to_index'][key_block.name])
+                item['key_blocks'].append(key_block)
+
+        shape_key_lookup = []
+        for item in grouped_items.values():
+            key_blocks = item['shape_key'].key_blocks
+            slider_min = np.empty(len(key_blocks), dtype=np.float32)
+            slider_max = np.empty(len(key_blocks), dtype=np.float32)
+            key_blocks.foreach_get('slider_min', slider_min)
+            key_blocks.foreach_get('slider_max', slider_max)
+
+            key_block_indices = np.array(item['key_block_indices'], dtype=np.int64)
+            shape_key_lookup.append({
+                'shape_key': item['shape_key'],
+                'key_block_names': item['key_block_names'],
+                'channel_indices': np.array(item['channel_indices'], dtype=np.int64),
+                'key_block_indices': key_block_indices,
+                'key_blocks': item['key_blocks'],
+                'slider_min': slider_min[key_block_indices],
+                'slider_max': slider_max[key_block_indices]
+            })
+
+        # the shape key values need to all be written again with the new lookup
+        self.data.pop('head_previous_blend_shape_outputs', None)
+        self.data['head_shape_key_lookup'] = shape_key_lookup
+        return self.data['head_shape_key_lookup']
+    
+    @property
+    def head_blend_shape_deltas(self) -> list[dict]:
+        """
+        The blend shape deltas of each head mesh without shape keys, as sparse rows of blend shape 
+        channel, vertex index and delta in object space. The neutral vertex positions are kept in 
+        a mesh attribute, so they survive saving and undo while the mesh is deformed.
+        """
+        if not self.head_dna_reader:
+            return []
+        
+        blend_shape_deltas = self.data.get('head_blend_shape_deltas')
+        if blend_shape_deltas is not None:
+            return blend_shape_deltas
+        
+        from .dna_io import get_blend_shape_target_deltas
+
+        reader = self.get_geometry_dna_reader(component='head')
+        if not reader:
+            return []
+        
+        file_path = Path(bpy.path.abspath(self.head_dna_file_path)).absolute()
+        linear_modifier = 1 / SCALE_FACTOR if reader.getTranslationUnit().name.lower() == 'cm' else 1
+        # DNA is Y-up, Blender is Z-up, so we need to rotate the deltas
+        rotation_matrix = np.array(Matrix.Rotation(math.radians(90), 3, 'X')) * linear_modifier
+
+        blend_shape_deltas = []
+        for mesh_index in self.head_mesh_blend_shape_channel_lookup:
+            mesh_object = self.head_mesh_index_lookup.get(mesh_index)
+            target_count = reader.getBlendShapeTargetCount(mesh_index)
+            if not mesh_object or not target_count:
+                continue
+
+            mesh = mesh_object.data
+            if mesh.shape_keys: # type: ignore
+                logger.warning(f'The mesh "{mesh_object.name}" has shape keys, so its vertex positions can not be deformed directly')
+                continue
+
+            vertex_count = len(mesh.vertices) # type: ignore
+            base_positions = np.empty(vertex_count * 3, dtype=np.float32)
+            attribute = mesh.attributes.get(BASE_POSITION_ATTRIBUTE_NAME) # type: ignore
+            if attribute and attribute.domain == 'POINT' and attribute.data_type == 'FLOAT_VECTOR':
+                attribute.data.foreach_get('vector', base_positions)
+            else:
+                mesh.vertices.foreach_get('co', base_positions) # type: ignore
+                attribute = mesh.attributes.new(BASE_POSITION_ATTRIBUTE_NAME, 'FLOAT_VECTOR', 'POINT') # type: ignore
+                attribute.data.foreach_set('vector', base_positions)
+
+            target_deltas = get_blend_shape_target_deltas(reader, mesh_index, file_path=file_path)
+            channel_indices = np.repeat(
+                [reader.getBlendShapeChannelIndex(mesh_index, index) for index in range(target_count)],
+                np.diff(target_deltas['offsets'])
+            )
+            vertex_indices = target_deltas['vertex_indices'].astype(np.int64)
+            deltas = (target_deltas['deltas'] @ rotation_matrix.T).astype(np.float32)
+
+            missing = vertex_indices >= vertex_count
+            if missing.any():
+                logger.warning(
+                    f'{int(missing.sum())} blend shape vertex indices are missing. '
+                    f'Were these deleted on the base mesh "{mesh_object.name}"?'
+                )
+                channel_indices = channel_indices[~missing]
+                vertex_indices = vertex_indices[~missing]
+                deltas = deltas[~missing]
+
+            blend_shape_deltas.append({
+                'mesh_object': mesh_object,
+                'base_positions': base_positions.reshape(-1, 3),
+                'channel_indices': channel_indices,
+                'vertex_indices': vertex_indices,
+                'deltas': deltas
+            })
+
+        self.data['head_blend_shape_deltas'] = blend_shape_deltas
+        return self.data['head_blend_shape_deltas']
+
     @property
     def head_rest_pose(self) -> dict[str, tuple[Vector, Euler, Vector, Matrix]]:
         rest_pose = self.data.get('head_rest_pose', {})
@@ -727,6 +1323,45 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         # return a copy so the original rest position is not modified
         return self.data['head_rest_pose']
     
+    @property
+    def head_joint_lookup(self) -> dict[str, np.ndarray]:
+        if not self.head_rig or not self.head_dna_reader or not self.head_rest_pose:
+            return {}
+
+        # the cached lookup is only valid as long as no bones have been added or removed from the rig
+        joint_lookup = self.data.get('head_joint_lookup')
+        if joint_lookup and joint_lookup['pose_bone_count'] == len(self.head_rig.pose.bones):
+            return joint_lookup
+        
+        # only the facial bones are driven by rig logic
+        self.data['head_joint_lookup'] = get_joint_lookup(
+            dna_reader=self.head_dna_reader,
+            rig_object=self.head_rig,
+            rest_pose=self.head_rest_pose,
+            include=lambda name: name.startswith('FACIAL_')
+        )
+        return self.data['head_joint_lookup']
+
+    @property
+    def head_gui_control_lookup(self) -> dict[str, np.ndarray]:
+        if not self.face_board or not self.head_dna_reader:
+            return {}
+
+        # the cached lookup is only valid for the same face board with the same bones
+        gui_control_lookup = self.data.get('head_gui_control_lookup')
+        if (
+            gui_control_lookup and 
+            gui_control_lookup['face_board_name'] == self.face_board.name and
+            gui_control_lookup['pose_bone_count'] == len(self.face_board.pose.bones)
+        ):
+            return gui_control_lookup
+        
+        self.data['head_gui_control_lookup'] = get_gui_control_lookup(
+            dna_reader=self.head_dna_reader,
+            face_board=self.face_board
+        )
+        return self.data['head_gui_control_lookup']
+
     @property
     def head_raw_control_bone_names(self) -> list[str]:
         raw_control_bone_names = self.data.get('head_raw_control_bone_names', [])
@@ -771,6 +1406,26 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         # return a copy so the original rest position is not modified
         return self.data['body_rest_pose']
     
+    @property
+    def body_joint_lookup(self) -> dict[str, np.ndarray]:
+        if not self.body_rig or not self.body_dna_reader or not self.body_rest_pose:
+            return {}
+
+        # the cached lookup is only valid as long as no bones have been added or removed from the rig
+        joint_lookup = self.data.get('body_joint_lookup')
+        if joint_lookup and joint_lookup['pose_bone_count'] == len(self.body_rig.pose.bones):
+            return joint_lookup
+        
+        # only the driven bones are updated by rig logic
+        raw_control_bone_names = set(self.body_raw_control_bone_names)
+        self.data['body_joint_lookup'] = get_joint_lookup(
+            dna_reader=self.body_dna_reader,
+            rig_object=self.body_rig,
+            rest_pose=self.body_rest_pose,
+            include=lambda name: name not in raw_control_bone_names
+        )
+        return self.data['body_joint_lookup']
+
     @property
     def body_raw_control_bone_names(self) -> list[str]:
         raw_control_bone_names = self.data.get('body_raw_control_bone_names', [])
@@ -793,13 +1448,14 @@ class RigLogicInstance(bpy.types.PropertyGroup):
             return
         
         from .bindings import riglogic
-        from .dna_io import get_dna_reader
 
         # ---- Initialize the Head Rig Logic Instance ---
-        # set the dna reader
-        self.data['head_dna_reader'] = get_dna_reader(
+        # set the shared dna reader and rig logic manager
+        # the face rig only evaluates the joints, blend shapes and animated maps of the behavior 
+        # layer, so the geometry is only loaded when it is asked for
+        self.data['head_dna_reader'], self.data['head_manager'] = get_rig_logic_manager(
             file_path=Path(bpy.path.abspath(self.head_dna_file_path)).absolute(),
-            memory_resource=None
+            data_layer='Behavior'
         )
 
         # make sure the rig bones are using the correct rotation mode
@@ -810,34 +1466,48 @@ class RigLogicInstance(bpy.types.PropertyGroup):
                 else:
                     pose_bone.rotation_mode = "QUATERNION"
 
-        # set the rig logic manager and instance
-        self.data['head_manager'] = riglogic.RigLogic.create(
-            reader=self.data['head_dna_reader'],
-            config=riglogic.Configuration(),
-            memRes=None
-        )
+        # each instance has its own rig instance to hold its control values and outputs
         self.data['head_instance'] = riglogic.RigInstance.create(
             rigLogic=self.data['head_manager'], 
             memRes=None
         )
-
-        # calling theses properties will cache their values
-        self.head_texture_masks_node
-        self.head_mesh_index_lookup
-        self.head_channel_name_to_index_lookup
-        self.head_channel_index_to_mesh_index_lookup
-        self.head_shape_key_blocks
-        self.head_raw_control_bone_names
-        self.head_rest_pose
+        # the new rig instance has none of the control values set, so they all need to be set on 
+        # it and all of its outputs written again
+        self.data.pop('head_gui_control_values', None)
+        self.data.pop('head_previous_blend_shape_outputs', None)
+        self.data.pop('head_previous_animated_map_outputs', None)
+        self.data.get('head_joint_lookup', {}).pop('previous_values', None)
+        # the offline rig instance belongs to the previous rig logic manager
+        self.data.pop('head_offline_instance', None)
+
+        # warm up the lookups, reading these properties caches their values so the first evaluation is fast
+        _ = (
+            self.head_texture_masks_node,
+            self.head_mesh_index_lookup,
+            self.head_channel_name_to_index_lookup,
+            self.head_channel_index_to_mesh_index_lookup
+        )
+        if self.shape_key_evaluation_mode == 'sparse_deltas':
+            _ = self.head_blend_shape_deltas
+        else:
+            _ = (self.head_shape_key_blocks, self.head_shape_key_lookup)
+        _ = (
+            self.head_raw_control_bone_names,
+            self.head_rest_pose,
+            self.head_joint_lookup,
+            self.head_gui_control_lookup
+        )
 
         # ---- Initialize the Body Rig Logic Instance ---
         if self.body_dna_file_path:
             body_dna_file_path = Path(bpy.path.abspath(self.body_dna_file_path)).absolute()
             if body_dna_file_path.exists():
-                # set the body dna reader
-                self.data['body_dna_reader'] = get_dna_reader(
+                # set the shared body dna reader and rig logic manager
+                # the body rig also evaluates the RBF and twist swing layers, so only the blend 
+                # shapes are left out
+                self.data['body_dna_reader'], self.data['body_manager'] = get_rig_logic_manager(
                     file_path=body_dna_file_path,
-                    memory_resource=None
+                    data_layer='AllWithoutBlendShapes'
                 )
 
                 # make sure the body bones are using the correct rotation mode
@@ -848,68 +1518,98 @@ class RigLogicInstance(bpy.types.PropertyGroup):
                         else:
                             pose_bone.rotation_mode = "XYZ"
 
-                # set the rig logic manager and instance
-                self.data['body_manager'] = riglogic.RigLogic.create(
-                    reader=self.data['body_dna_reader'],
-                    config=riglogic.Configuration(),
-                    memRes=None
-                )
+                # each instance has its own rig instance to hold its control values and outputs
                 self.data['body_instance'] = riglogic.RigInstance.create(
                     rigLogic=self.data['body_manager'], 
                     memRes=None
                 )
+                self.data.get('body_joint_lookup', {}).pop('previous_values', None)
 
-                # calling theses properties will cache their values
-                self.body_raw_control_bone_names
-                self.body_rest_pose
+                # warm up the lookups, reading these properties caches their values so the first evaluation is fast
+                _ = (
+                    self.body_raw_control_bone_names,
+                    self.body_rest_pose,
+                    self.body_joint_lookup
+                )
 
         self.data['initialized'] = True
+        # the managers this instance used before it was initialized again may no longer be needed
+        release_rig_logic_managers()
+
+    def get_geometry_dna_reader(self, component: ComponentType = 'head') -> 'riglogic.BinaryStreamReader | None':
+        """
+        Gets a reader with the geometry and blend shapes of the component's DNA file. This is not 
+        kept on the instance, the process wide reader cache decides how long it stays loaded.
+        """
+        from .dna_io import get_dna_reader
+
+        if component == 'head':
+            dna_file_path = self.head_dna_file_path
+        elif component == 'body':
+            dna_file_path = self.body_dna_file_path
+        else:
+            return None
+
+        file_path = Path(bpy.path.abspath(dna_file_path)).absolute()
+        if not dna_file_path or not file_path.exists():
+            return None
+        return get_dna_reader(file_path=file_path, data_layer='Geometry')
 
     def destroy(self):            
         # clears these data items from the dictionary, this frees them up to be garbage collected
         self.data.clear()
         self.data['initialized'] = False
+        release_rig_logic_managers()
+        utilities.clear_vertex_kd_trees()
 
 
-    def update_head_gui_control_values(self, override_values: dict[str, dict[str, float]] | None = None):
+    def update_head_gui_control_values(
+            self, 
+            override_values: dict[str, dict[str, float]] | None = None,
+            calculate: bool = True
+        ):
         # skip if the face board is not set
         if not self.face_board or not self.head_dna_reader:
             return
         
-        missing_gui_controls = []
-        
-        for index in range(self.head_dna_reader.getGUIControlCount()):
-            full_name = self.head_dna_reader.getGUIControlName(index)
-            control_name, axis = full_name.split('.')
-            axis = axis.rsplit('t',-1)[-1].lower()
-            if self.face_board:
-                # override the values can be provided to update values based on them vs current face board bone locations 
-                # This can be used for baking the values to an action
-                if override_values:
-                    value = override_values.get(control_name, {}).get(axis)
-                    if value is not None:
-                        self.head_instance.setGUIControl(index, value)
-                else:
-                    pose_bone = self.face_board.pose.bones.get(control_name)
-                    if pose_bone:
-                        value = getattr(pose_bone.location, axis)
-                        self.head_instance.setGUIControl(index, value)
-                    else:
-                        missing_gui_controls.append(control_name)
-
-        if missing_gui_controls and not self.data.get('logged_missing_gui_controls'):
-            logger.warning(f'The following GUI controls are missing on "{self.face_board.name}":\n{pformat(missing_gui_controls)}.')
-            logger.warning(f'You are not listening to {len(missing_gui_controls)} GUI controls')
-            logger.warning('This is most likely due to the DNA file being an older version then what the face board currently supports.')
-            logger.warning('Using a new .dna file created from the latest version of MetaHuman Creator will probably resolve this.')
-            self.data['logged_missing_gui_controls'] = True
+        gui_control_lookup = self.head_gui_control_lookup
+        previous_values = self.data.get('head_gui_control_values')
+        if previous_values is None or len(previous_values) != len(gui_control_lookup['axes']):
+            previous_values = None
+            values = np.zeros(len(gui_control_lookup['axes']), dtype=np.float32)
+        else:
+            values = previous_values.copy()
+
+        # override the values can be provided to update values based on them vs current face board bone locations 
+        # This can be used for baking the values to an action
+        if override_values:
+            for index, (control_name, axis) in enumerate(zip(gui_control_lookup['control_names'], gui_control_lookup['axes'].tolist())):
+                value = override_values.get(control_name, {}).get('xyz'[axis])
+                if value is not None:
+                    values[index] = value
+        else:
+            # read the locations of all the face board bones at once
+            pose_bones = self.face_board.pose.bones
+            locations = np.empty(len(pose_bones) * 3, dtype=np.float32)
+            pose_bones.foreach_get('location', locations)
+
+            gui_control_indices = gui_control_lookup['gui_control_indices']
+            values[gui_control_indices] = locations.reshape(-1, 3)[
+                gui_control_lookup['pose_bone_indices'], 
+                gui_control_lookup['axes'][gui_control_indices]
+            ]
+
+        set_gui_control_values(
+            rig_instance=self.head_instance, 
+            values=values, 
+            previous_values=previous_values
+        )
+        self.data['head_gui_control_values'] = values
 
         # set the active LOD level for the head instance to optimize performance
         self.head_instance.setLOD(level=int(self.active_lod[-1]))
-        # map the GUI changes to the raw controls
-        self.head_manager.mapGUIToRawControls(self.head_instance)
-        # calculate the controls
-        self.head_manager.calculate(self.head_instance)
+        if calculate:
+            calculate_rig_logic_controls(self.head_manager, self.head_instance)
 
     def solo_head_shape_key_value(self, shape_key: bpy.types.ShapeKey):
         # skip if the head mesh is not set
@@ -929,7 +1629,10 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         # set the provided shape key value to 1.0
         shape_key.value = 1.0
 
-    def update_head_shape_keys(self) -> list[tuple[bpy.types.ShapeKey, float]]:
+        # the shape key values no longer match the rig logic outputs, so they all need to be written next evaluation
+        self.data.pop('head_previous_blend_shape_outputs', None)
+
+    def update_head_shape_keys(self, force: bool = False) -> list[tuple[bpy.types.ShapeKey, float]]:
         # skip if the head mesh is not set
         if not self.head_mesh or not self.head_dna_reader:
             return []
@@ -938,52 +1641,114 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         if len(bpy.data.shape_keys) == 0:
             return []
         
-        missing_shape_keys = []
+        shape_key_lookup = self.head_shape_key_lookup
+        if not shape_key_lookup:
+            return []
+
+        blend_shape_outputs = np.asarray(self.head_instance.getBlendShapeOutputs(), dtype=np.float32)
+        changed = get_changed_output_indices(
+            values=blend_shape_outputs, 
+            history=self.data, 
+            key='head_previous_blend_shape_outputs', 
+            force=force
+        )
+        if not len(changed):
+            return []
+        
+        is_channel_changed = np.zeros(len(blend_shape_outputs), dtype=bool)
+        is_channel_changed[changed] = True
+
         shape_key_values = []
-    
-        # update blend shapes
-        for index, value in enumerate(self.head_instance.getBlendShapeOutputs()):  
-            for shape_key in self.head_shape_key_blocks.get(index, []):
-                if shape_key:
-                    shape_key.value = value
-                    shape_key_values.append((shape_key, value))
-                else:
-                    missing_shape_keys.append(index)
-
-        if missing_shape_keys and not self.data.get('logged_missing_shape_keys'):
-            name_lookup = {v:k for k,v in self.head_channel_name_to_index_lookup.items()}
-            missing_data = {}
-            # group the missing shape keys by mesh object
-            for index in missing_shape_keys:
-                missing_name = name_lookup[index]
-                mesh_index = self.head_channel_index_to_mesh_index_lookup[index]
-                mesh_object = self.head_mesh_index_lookup[mesh_index]
-                if len(missing_name) > SHAPE_KEY_NAME_MAX_LENGTH:
-                    # skip warning the user about any missing shape keys names being too long.
-
-                    # Currently, Blender has a limit of 63 characters for shape key names.
-                    # This is something that the user might be able to overcome by changing blender 
-                    # source and recompiling. However, this is not something that we can fix in the addon.
-
-                    # Because this limitation there are 42 missing shape keys from the MetaHuman creator DNA files 
-                    # that can't be imported because their names are too long. However these are extreme 
-                    # combinations and for most people this will not be an issue.
-                    continue
+        for item in shape_key_lookup:
+            is_changed = is_channel_changed[item['channel_indices']]
+            # skip the shape keys that have none of their channels changed
+            if not is_changed.any():
+                continue
 
-                missing_data[mesh_object.name] = missing_data.get(mesh_object.name, [])
-                missing_data[mesh_object.name].append(missing_name)
-            
-            for mesh_name, missing_names in missing_data.items():
-                logger.warning(f'The following shape key blocks are missing on "{mesh_name}":\n{pformat(missing_names)}.')
+            # read all the current values, so the key blocks not driven by rig logic are preserved
+            key_blocks = item['shape_key'].key_blocks
+            values = np.empty(len(key_blocks), dtype=np.float32)
+            key_blocks.foreach_get('value', values)
+
+            # clamp the same way setting the value on each shape key block would
+            new_values = np.clip(
+                blend_shape_outputs[item['channel_indices']], 
+                item['slider_min'], 
+                item['slider_max']
+            )
+            values[item['key_block_indices']] = new_values
+            key_blocks.foreach_set('value', values)
+            item['shape_key'].update_tag()
+
+            shape_key_values.extend(
+                (item['key_blocks'][index], float(new_values[index])) for index in np.flatnonzero(is_changed)
+            )
 
-            if len(missing_data.keys()) > 0:
-                logger.warning(f'A total of {len(missing_data.keys())} shape key blocks are not being updated by Rig Logic.')
+        return shape_key_values
+
+    def update_head_blend_shape_deltas(self, force: bool = False) -> list[bpy.types.Object]:
+        # skip if the head mesh is not set
+        if not self.head_mesh or not self.head_dna_reader:
+            return []
+        
+        blend_shape_deltas = self.head_blend_shape_deltas
+        if not blend_shape_deltas:
+            return []
+        
+        blend_shape_outputs = np.asarray(self.head_instance.getBlendShapeOutputs(), dtype=np.float32)
+        changed = get_changed_output_indices(
+            values=blend_shape_outputs, 
+            history=self.data, 
+            key='head_previous_blend_shape_outputs', 
+            force=force
+        )
+        if not len(changed):
+            return []
+        
+        is_channel_changed = np.zeros(len(blend_shape_outputs), dtype=bool)
+        is_channel_changed[changed] = True
+
+        mesh_objects = []
+        for item in blend_shape_deltas:
+            # skip the meshes that have none of their channels changed
+            if not is_channel_changed[item['channel_indices']].any():
+                continue
+
+            positions = calculate_blend_shape_positions(
+                base_positions=item['base_positions'],
+                blend_shape_outputs=blend_shape_outputs,
+                channel_indices=item['channel_indices'],
+                vertex_indices=item['vertex_indices'],
+                deltas=item['deltas']
+            )
+            mesh = item['mesh_object'].data
+            mesh.vertices.foreach_set('co', positions.ravel())
+            mesh.update_tag()
+            mesh_objects.append(item['mesh_object'])
+
+        return mesh_objects
+
+    def reset_head_blend_shape_deltas(self):
+        """
+        Restores the neutral vertex positions of the meshes deformed by the sparse blend shape 
+        deltas, and removes the attribute they were kept in.
+        """
+        for mesh_object in self.head_mesh_index_lookup.values():
+            mesh = mesh_object.data
+            attribute = mesh.attributes.get(BASE_POSITION_ATTRIBUTE_NAME) # type: ignore
+            if not attribute:
+                continue
             
-            self.data['logged_missing_shape_keys'] = True
+            base_positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32) # type: ignore
+            attribute.data.foreach_get('vector', base_positions)
+            mesh.attributes.remove(attribute) # type: ignore
+            mesh.vertices.foreach_set('co', base_positions) # type: ignore
+            mesh.update_tag()
 
-        return shape_key_values
+        self.data.pop('head_blend_shape_deltas', None)
+        self.data.pop('head_previous_blend_shape_outputs', None)
 
-    def update_head_texture_masks(self) -> list[tuple[str, float]]:
+    def update_head_texture_masks(self, force: bool = False) -> list[tuple[str, float]]:
         # skip if the material is not set
         if not self.head_material or not self.head_dna_reader:
             return []
@@ -995,8 +1760,17 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         
         texture_mask_values = []
 
-        # update texture masks values
-        for index, value in enumerate(self.head_instance.getAnimatedMapOutputs()):
+        animated_map_outputs = np.asarray(self.head_instance.getAnimatedMapOutputs(), dtype=np.float64)
+        changed = get_changed_output_indices(
+            values=animated_map_outputs, 
+            history=self.data, 
+            key='head_previous_animated_map_outputs', 
+            force=force
+        )
+
+        # update only the texture masks values that changed
+        for index in changed.tolist():
+            value = float(animated_map_outputs[index])
             name = self.head_dna_reader.getAnimatedMapName(index) 
             slider_name = f"{name.split('.')[-1]}_msk"
             mask_slider = self.head_texture_masks_node.inputs.get(slider_name)
@@ -1008,7 +1782,7 @@ class RigLogicInstance(bpy.types.PropertyGroup):
 
         return texture_mask_values
 
-    def update_head_bone_transforms(self):
+    def update_head_bone_transforms(self, force: bool = False):
         # skip if the head rig is not set
         if not self.head_rig or not self.head_dna_reader:
             return
@@ -1018,57 +1792,16 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         if not self.head_rest_pose:
             return
 
-        raw_joint_output = self.head_instance.getRawJointOutputs()
-        # update joint transforms
-        for index in range(self.head_dna_reader.getJointCount()):
-            # get the bone 
-            name = self.head_dna_reader.getJointName(index)
-
-            # only update the facial bones
-            if not name.startswith('FACIAL_'):
-                continue
+        joint_lookup = self.head_joint_lookup
+        if not joint_lookup:
+            return
 
-            pose_bone = self.head_rig.pose.bones.get(name)
-            if pose_bone:
-                # get the rest pose values that we saved during initialization
-                rest_location, rest_rotation, rest_scale, rest_to_parent_matrix = self.head_rest_pose[pose_bone.name]
-
-                # get the values
-                matrix_index = (index + 1) * 9
-                values = raw_joint_output[(index * 9):matrix_index]
-
-                # extract the delta values
-                location_delta = Vector([values[0]/SCALE_FACTOR, values[1]/SCALE_FACTOR, values[2]/SCALE_FACTOR])
-                rotation_delta = Euler([math.radians(values[3]), math.radians(values[4]), math.radians(values[5])])
-                scale_delta = Vector(values[6:9])
-
-                # update the transformations using the rest pose and the delta values
-                # we need to copy the vectors so we don't modify the original rest pose
-                location = Vector((
-                    rest_location.x + location_delta.x,
-                    rest_location.y + location_delta.y,
-                    rest_location.z + location_delta.z
-                ))
-                rotation = Euler((
-                    rest_rotation.x + rotation_delta.x,
-                    rest_rotation.y + rotation_delta.y,
-                    rest_rotation.z + rotation_delta.z
-                ))
-                scale = Vector((
-                    rest_scale.x + scale_delta.x,
-                    rest_scale.y + scale_delta.y,
-                    rest_scale.z + scale_delta.z
-                ))
-
-                # update the bone matrix
-                modified_matrix = Matrix.LocRotScale(location, rotation, scale)
-                pose_bone.matrix_basis = rest_to_parent_matrix.inverted() @ modified_matrix
-
-                # if the bone is not a leaf bone, we need to update the rotation again
-                if pose_bone.children:
-                    pose_bone.rotation_euler = rotation_delta
-            else:
-                logger.warning(f'The bone "{name}" was not found on "{self.head_rig.name}". Rig Logic will not update the bone.')
+        apply_raw_joint_outputs(
+            rig_object=self.head_rig,
+            joint_lookup=joint_lookup,
+            raw_joint_output=self.head_instance.getRawJointOutputs(),
+            force=force
+        )
 
     def reset_body_raw_control_values(self):
         # skip if the body rig is not set
@@ -1148,7 +1881,7 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         # self.body_manager.calculateRBFControls(self.body_instance)
         self.body_manager.calculate(self.body_instance)
 
-    def update_body_bone_transforms(self):
+    def update_body_bone_transforms(self, force: bool = False):
         # skip if the body rig is not set
         if not self.body_rig or not self.body_dna_reader:
             return
@@ -1157,87 +1890,156 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         if not self.body_rest_pose:
             return
 
-        raw_joint_output = self.body_instance.getRawJointOutputs()
+        joint_lookup = self.body_joint_lookup
+        if not joint_lookup:
+            return
+
+        apply_raw_joint_outputs(
+            rig_object=self.body_rig,
+            joint_lookup=joint_lookup,
+            raw_joint_output=self.body_instance.getRawJointOutputs(),
+            force=force
+        )
+
+    def update_controls(
+            self, 
+            component: Literal['head', 'body', 'all'] = 'all'
+        ) -> list[tuple['riglogic.RigLogic', 'riglogic.RigInstance']]:
+        """
+        Reads the control values from the scene and sets them on the rig logic instances. Returns 
+        the rig logic managers and instances that need to be calculated afterwards.
+        """
+        if not self.initialized:
+            self.initialize()
+
+        if not self.initialized:
+            logger.error(f'The Rig Logic Instance {self.name} could not be initialized.')
+            return []
         
-        # update joint transforms
-        for index in range(self.body_dna_reader.getJointCount()):
-            # get the bone 
-            name = self.body_dna_reader.getJointName(index)
+        controls = []
+        if component in ('head', 'all'):
+            self.update_head_gui_control_values(calculate=False)
+            controls.append((self.head_manager, self.head_instance))
 
-            # Only update driven bones
-            if name in self.body_raw_control_bone_names:
-                continue
+        return controls
+
+    def apply_outputs(self, component: Literal['head', 'body', 'all'] = 'all'):
+        """
+        Applies the calculated rig logic outputs to the scene.
+        """
+        if not self.initialized:
+            return
 
-            pose_bone = self.body_rig.pose.bones.get(name)
-            if pose_bone:
-                # get the rest pose values that we saved during initialization
-                rest_location, rest_rotation, rest_scale, rest_to_parent_matrix = self.body_rest_pose[pose_bone.name]
-
-                # get the values
-                matrix_index = (index + 1) * 9
-                values = raw_joint_output[(index * 9):matrix_index]
-
-                # extract the delta values
-                location_delta = Vector([values[0]/SCALE_FACTOR, values[1]/SCALE_FACTOR, values[2]/SCALE_FACTOR])
-                rotation_delta = Euler([math.radians(values[3]), math.radians(values[4]), math.radians(values[5])])
-                scale_delta = Vector(values[6:9])
-
-                # update the transformations using the rest pose and the delta values
-                # we need to copy the vectors so we don't modify the original rest pose
-                location = Vector((
-                    rest_location.x + location_delta.x,
-                    rest_location.y + location_delta.y,
-                    rest_location.z + location_delta.z
-                ))
-                rotation = Euler((
-                    rest_rotation.x + rotation_delta.x,
-                    rest_rotation.y + rotation_delta.y,
-                    rest_rotation.z + rotation_delta.z
-                ))
-                scale = Vector((
-                    rest_scale.x + scale_delta.x,
-                    rest_scale.y + scale_delta.y,
-                    rest_scale.z + scale_delta.z
-                ))
-
-                # update the bone matrix
-                modified_matrix = Matrix.LocRotScale(location, rotation, scale)
-                pose_bone.matrix_basis = rest_to_parent_matrix.inverted() @ modified_matrix
-
-                # if the bone is not a leaf bone, we need to update the rotation again
-                if pose_bone.children:
-                    pose_bone.rotation_euler = rotation_delta
+        if component in ('head', 'all'):
+            # apply the changes
+            if self.evaluate_bones:
+                self.update_head_bone_transforms()
+            else:
+                # forget the applied outputs so everything is written again once this is re-enabled
+                self.data.get('head_joint_lookup', {}).pop('previous_values', None)
+            if self.evaluate_shape_keys:
+                if self.shape_key_evaluation_mode == 'sparse_deltas':
+                    self.update_head_blend_shape_deltas()
+                else:
+                    self.update_head_shape_keys()
+            else:
+                self.data.pop('head_previous_blend_shape_outputs', None)
+            if self.evaluate_texture_masks:
+                self.update_head_texture_masks()
             else:
-                logger.warning(f'The bone "{name}" was not found on "{self.body_rig.name}". Rig Logic will not update the bone.')
+                self.data.pop('head_previous_animated_map_outputs', None)
+
+        # if component in ('body', 'all'):
+        #     # apply the changes
+        #     if self.evaluate_rbfs:
+        #         self.update_body_raw_control_values()
+        #         self.update_body_bone_transforms()
 
     def evaluate(self, component: Literal['head', 'body', 'all'] = 'all'):
         # this condition prevents constant evaluation
         if bpy.context.window_manager.meta_human_dna.evaluate_dependency_graph: # type: ignore
+            controls = self.update_controls(component=component)
             if not self.initialized:
-                self.initialize()
-
-            if not self.initialized:
-                logger.error(f'The Rig Logic Instance {self.name} could not be initialized.')
                 return
             
             # turn off the dependency graph evaluation so we can update the controls without triggering an update
             bpy.context.window_manager.meta_human_dna.evaluate_dependency_graph = False # type: ignore
             
-            if component in ('head', 'all'):
-                self.update_head_gui_control_values()
-                # apply the changes
-                if self.evaluate_bones:
-                    self.update_head_bone_transforms()
-                if self.evaluate_shape_keys:
-                    self.update_head_shape_keys()
-                if self.evaluate_texture_masks:
-                    self.update_head_texture_masks()
-
-            # if component in ('body', 'all'):
-            #     # apply the changes
-            #     if self.evaluate_rbfs:
-            #         self.update_body_raw_control_values()
-            #         self.update_body_bone_transforms()
+            for manager, rig_instance in controls:
+                calculate_rig_logic_controls(manager, rig_instance)
+            self.apply_outputs(component=component)
 
             # turn on the dependency graph evaluation back on
             bpy.context.window_manager.meta_human_dna.evaluate_dependency_graph = True # type: ignore
+
+    def calculate_head_outputs(
+            self,
+            frames: list[float] | np.ndarray | None = None,
+            action: bpy.types.Action | None = None,
+            gui_control_values: np.ndarray | None = None,
+            lod: int | None = None
+        ) -> dict[str, np.ndarray]:
+        """
+        Evaluates the head rig logic for many frames at once without modifying the scene. The GUI 
+        control values are either given directly as a (frames, controls) array, or sampled from 
+        the face board F-curves in the action. A separate rig instance is used, so the interactive 
+        evaluation is not affected.
+        """
+        if gui_control_values is not None:
+            gui_control_values = np.atleast_2d(np.asarray(gui_control_values, dtype=np.float32))
+            if frames is not None and len(frames) != len(gui_control_values):
+                raise ValueError(
+                    f'The number of frames ({len(frames)}) must match the number of '
+                    f'GUI control value rows ({len(gui_control_values)}).'
+                )
+
+        if not self.initialized:
+            self.initialize()
+        if not self.initialized:
+            raise RuntimeError(f'The Rig Logic Instance {self.name} could not be initialized.')
+
+        from .bindings import riglogic
+
+        gui_control_lookup = self.head_gui_control_lookup
+        if gui_control_values is None:
+            if action is None:
+                action = self.face_board.animation_data.action if self.face_board and self.face_board.animation_data else None
+            if action is None:
+                raise ValueError('Either GUI control values or an action with face board F-curves must be given.')
+            
+            if frames is None:
+                start, end = action.frame_range
+                frames = np.arange(int(start), int(end) + 1)
+            frames = np.asarray(frames, dtype=np.float64)
+
+            # controls that are not animated keep the current value from the face board
+            default_values = self.data.get('head_gui_control_values')
+            if default_values is None or len(default_values) != len(gui_control_lookup['axes']):
+                default_values = None
+            gui_control_values = get_action_gui_control_values(
+                action=action,
+                gui_control_lookup=gui_control_lookup,
+                frames=frames,
+                default_values=default_values
+            )
+        else:
+            frames = np.asarray(frames if frames is not None else range(len(gui_control_values)), dtype=np.float64)
+
+        # this rig instance is only used for offline evaluation so the interactive state is left untouched
+        rig_instance = self.data.get('head_offline_instance')
+        if rig_instance is None:
+            rig_instance = riglogic.RigInstance.create(
+                rigLogic=self.head_manager, 
+                memRes=None
+            )
+            self.data['head_offline_instance'] = rig_instance
+
+        outputs = calculate_rig_logic_outputs(
+            manager=self.head_manager,
+            rig_instance=rig_instance,
+            gui_control_values=gui_control_values,
+            lod=int(self.active_lod[-1]) if lod is None else lod
+        )
+        outputs['frames'] = frames
+        outputs['gui_control_values'] = gui_control_values
+        return outputs
@@ -502,6 +502,14 @@ def poll_shrink_wrap_target(self, scene_object: bpy.types.Object) -> bool:
 def update_evaluate_rbfs_value(self, context):
     self.reset_body_raw_control_values()
 
+def update_shape_key_evaluation_mode(self, context):
+    # restore the neutral vertex positions and re-cache the data for the new mode
+    self.reset_head_blend_shape_deltas()
+    self.data.pop('head_shape_key_blocks', None)
+    self.data.pop('head_shape_key_lookup', None)
+    if self.shape_key_evaluation_mode == 'sparse_deltas':
+        self.shape_key_list.clear()
+
 def update_head_topology_selection(self, context):
     from ..utilities import get_active_head
     head = get_active_head()
@@ -604,6 +612,8 @@ def set_instance_name(self, value):
                 old_name=old_name,
                 new_name=value
             )
+        # keep the rig logic data associated with the instance under its new name
+        self.instance_data[value] = self.instance_data.pop(old_name or '', {})
         self['instance_name'] = value
 
 def update_body_output_items(self, context):
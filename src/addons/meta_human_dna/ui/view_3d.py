@@ -442,6 +442,9 @@ class META_HUMAN_DNA_PT_view_options(bpy.types.Panel):
             row = col.row()
             row.prop(instance, 'active_lod', text='')
             row = self.layout.row()
+            row.enabled = bool(instance.head_mesh)
+            row.prop(instance, 'shape_key_evaluation_mode', text='Shape Keys')
+            row = self.layout.row()
             row.prop(instance, 'show_head_bones')
             row = self.layout.row()
             row.prop(instance, 'show_body_bones')
@@ -502,6 +505,10 @@ class META_HUMAN_DNA_PT_rig_logic(bpy.types.Panel):
             props.direction = 'DOWN' # type: ignore
             props.active_index = properties.rig_logic_instance_list_active_index # type: ignore
 
+        if len(properties.rig_logic_instance_list) > 1:
+            row = self.layout.row()
+            row.prop(properties, 'parallel_evaluation')
+
 
 class META_HUMAN_DNA_PT_rig_logic_head_sub_panel(SubPanelBase):
     bl_parent_id = "META_HUMAN_DNA_PT_rig_logic"
@@ -2,9 +2,10 @@ import os
 import bpy
 import json
 import logging
+import numpy as np
 from typing import TYPE_CHECKING
 from pathlib import Path
-from ..constants import Axis
+from ..constants import Axis, RIG_LOGIC_OUTPUT_DELTA_THRESHOLD
 from . import (
     switch_to_pose_mode,
     switch_to_object_mode
@@ -180,19 +181,189 @@ def bake_control_curve_values_for_frame(
     
     # now get the calculated values and bake them to the shape keys value
     if shape_keys:
-        for shape_key, value in instance.update_head_shape_keys():
+        for shape_key, value in instance.update_head_shape_keys(force=True):
             shape_key.value = value
             shape_key.keyframe_insert(data_path="value", frame=frame)
 
     # now bake the texture mask values
     if texture_logic_node and masks:
-        for slider_name, value in instance.update_head_texture_masks():
+        for slider_name, value in instance.update_head_texture_masks(force=True):
             texture_logic_node.inputs[slider_name].default_value = value # type: ignore
             texture_logic_node.inputs[slider_name].keyframe_insert(
                 data_path="default_value", 
                 frame=frame
             )
 
+def set_fcurve_keys(
+        channelbag: bpy.types.ActionChannelbag,
+        data_path: str,
+        index: int,
+        frames: np.ndarray,
+        values: np.ndarray,
+        action_group: str | None = None,
+        clean_curves: bool = False
+    ):
+    """
+    Creates an fcurve with a keyframe for each frame and value, writing all the keyframe 
+    points in a single call. Any existing fcurve with the same data path and index is replaced.
+    """
+    fcurve = channelbag.fcurves.find(data_path, index=index)
+    if fcurve:
+        channelbag.fcurves.remove(fcurve)
+
+    if clean_curves and len(values) > 2:
+        # remove the keys that have the same value as the keys on either side of them
+        redundant = np.zeros(len(values), dtype=bool)
+        redundant[1:-1] = (
+            (np.abs(values[1:-1] - values[:-2]) <= RIG_LOGIC_OUTPUT_DELTA_THRESHOLD) &
+            (np.abs(values[1:-1] - values[2:]) <= RIG_LOGIC_OUTPUT_DELTA_THRESHOLD)
+        )
+        frames = frames[~redundant]
+        values = values[~redundant]
+
+    fcurve = channelbag.fcurves.new(data_path=data_path, index=index)
+    if action_group:
+        fcurve.group = channelbag.groups.get(action_group) or channelbag.groups.new(action_group)
+    fcurve.keyframe_points.add(len(frames))
+    fcurve.keyframe_points.foreach_set(
+        'co', 
+        np.column_stack((frames, values)).astype(np.float32).ravel()
+    )
+    # recalculate the handles now that the points are set
+    fcurve.update()
+
+def get_baking_channelbag(id_data: bpy.types.ID) -> bpy.types.ActionChannelbag:
+    """
+    Gets the channelbag of the action slot that animates the data, creating the action, 
+    slot and channelbag if they don't exist yet.
+    """
+    animation_data = id_data.animation_data or id_data.animation_data_create()
+    if not animation_data.action: # type: ignore
+        animation_data.action = bpy.data.actions.new(name=f'{id_data.name}Action') # type: ignore
+    action = animation_data.action # type: ignore
+
+    if not animation_data.action_slot: # type: ignore
+        suitable_slots = animation_data.action_suitable_slots # type: ignore
+        if suitable_slots:
+            animation_data.action_slot = suitable_slots[0] # type: ignore
+        else:
+            animation_data.action_slot = action.slots.new(id_type=id_data.id_type, name=id_data.name) # type: ignore
+
+    layer = action.layers[0] if action.layers else action.layers.new('Layer')
+    strip = layer.strips[0] if layer.strips else layer.strips.new(type='KEYFRAME')
+    return strip.channelbag(animation_data.action_slot, ensure=True) # type: ignore
+
+def get_baking_frames(start_frame: int, end_frame: int, step: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the frames the bones are baked on, and the frames the shape keys and texture masks 
+    are baked on. These match the frames the bone bake operator and the per frame bake use.
+    """
+    frames = np.arange(start_frame, end_frame + 1)
+    return frames[::step], frames[frames % step == 0]
+
+def fast_bake_to_action(
+        instance: 'RigLogicInstance',
+        armature_object: bpy.types.Object,
+        action: bpy.types.Action,
+        bone_frames: np.ndarray,
+        frames: np.ndarray,
+        clean_curves: bool = True,
+        channel_types: set | None = None,
+        masks: bool = True,
+        shape_keys: bool = True
+    ):
+    """
+    Evaluates rig logic for all the frames first, then writes the results directly to the 
+    bone, shape key and texture mask fcurves. This avoids evaluating the scene and inserting 
+    keyframes one at a time for each frame. The bones are baked on the bone frames, and the 
+    shape keys and texture masks on the frames.
+    """
+    from ..rig_logic import get_pose_bone_transforms
+    from ..ui.callbacks import get_head_texture_logic_node
+
+    if channel_types is None:
+        channel_types = {"LOCATION", "ROTATION", "SCALE"}
+
+    all_frames = np.union1d(bone_frames, frames)
+    outputs = instance.calculate_head_outputs(action=action, frames=all_frames)
+    is_bone_frame = np.isin(all_frames, bone_frames)
+    is_frame = np.isin(all_frames, frames)
+
+    # bake the pose bone transforms
+    joint_lookup = instance.head_joint_lookup
+    joint_count = len(joint_lookup.get('joint_indices', []))
+    frame_count = len(bone_frames)
+    if channel_types and joint_count and frame_count:
+        values = outputs['joint_outputs'][is_bone_frame][:, joint_lookup['joint_indices']].astype(np.float64)
+        locations, rotations, scales = get_pose_bone_transforms(
+            joint_lookup, 
+            values.reshape(-1, 9), 
+            np.tile(np.arange(joint_count), frame_count)
+        )
+        armature_channelbag = get_baking_channelbag(armature_object)
+        pose_bones = armature_object.pose.bones
+        for channel_type, attribute, transforms in (
+            ('LOCATION', 'location', locations), 
+            ('ROTATION', 'rotation_euler', rotations), 
+            ('SCALE', 'scale', scales)
+        ):
+            if channel_type not in channel_types:
+                continue
+            transforms = transforms.reshape(frame_count, joint_count, 3)
+            for row, bone_index in enumerate(joint_lookup['pose_bone_indices'].tolist()):
+                bone_name = pose_bones[bone_index].name
+                for axis in range(3):
+                    set_fcurve_keys(
+                        channelbag=armature_channelbag,
+                        data_path=f'pose.bones["{bone_name}"].{attribute}',
+                        index=axis,
+                        frames=bone_frames,
+                        values=transforms[:, row, axis],
+                        action_group=bone_name,
+                        clean_curves=clean_curves
+                    )
+
+    if not len(frames):
+        return
+
+    # bake the shape key values
+    if shape_keys:
+        for shape_key_lookup in instance.head_shape_key_lookup:
+            values = np.clip(
+                outputs['blend_shape_outputs'][is_frame][:, shape_key_lookup['channel_indices']],
+                shape_key_lookup['slider_min'],
+                shape_key_lookup['slider_max']
+            )
+            shape_key_channelbag = get_baking_channelbag(shape_key_lookup['shape_key'])
+            for row, key_block in enumerate(shape_key_lookup['key_blocks']):
+                set_fcurve_keys(
+                    channelbag=shape_key_channelbag,
+                    data_path=key_block.path_from_id('value'),
+                    index=0,
+                    frames=frames,
+                    values=values[:, row],
+                    clean_curves=clean_curves
+                )
+
+    # bake the texture mask values
+    texture_logic_node = get_head_texture_logic_node(instance.head_material)
+    if texture_logic_node and masks:
+        node_tree_channelbag = get_baking_channelbag(texture_logic_node.id_data)
+        animated_map_outputs = outputs['animated_map_outputs'][is_frame]
+        for index in range(animated_map_outputs.shape[1]):
+            name = instance.head_dna_reader.getAnimatedMapName(index)
+            mask_slider = texture_logic_node.inputs.get(f"{name.split('.')[-1]}_msk")
+            if not mask_slider:
+                continue
+            set_fcurve_keys(
+                channelbag=node_tree_channelbag,
+                data_path=mask_slider.path_from_id('default_value'),
+                index=0,
+                frames=frames,
+                values=animated_map_outputs[:, index],
+                clean_curves=clean_curves
+            )
+
 def bake_to_action(
         armature_object: bpy.types.Object,
         action_name: str,
@@ -202,7 +373,8 @@ def bake_to_action(
         clean_curves: bool = True,
         channel_types: set | None = None,
         masks: bool = True,
-        shape_keys: bool = True
+        shape_keys: bool = True,
+        fast: bool = False
     ):
     from ..ui.callbacks import get_active_rig_logic, get_head_texture_logic_node
 
@@ -216,6 +388,22 @@ def bake_to_action(
             if not action:
                 return
             
+            if fast:
+                bone_frames, frames = get_baking_frames(start_frame, end_frame, step)
+                fast_bake_to_action(
+                    instance=instance,
+                    armature_object=armature_object,
+                    action=action,
+                    bone_frames=bone_frames,
+                    frames=frames,
+                    clean_curves=clean_curves,
+                    channel_types=channel_types,
+                    masks=masks,
+                    shape_keys=shape_keys
+                )
+                action.name = action_name
+                return
+
             instance.auto_evaluate = True            
             switch_to_object_mode()
             armature_object.hide_set(False)
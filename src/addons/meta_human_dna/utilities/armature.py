@@ -2,8 +2,10 @@ import bpy
 import math
 import bmesh
 import logging
+import numpy as np
 from typing import Literal
 from mathutils import Vector, Matrix, Euler
+from mathutils.kdtree import KDTree
 from .misc import (
     exclude_rig_logic_evaluation,
     preserve_context,
@@ -13,7 +15,9 @@ from .misc import (
 )
 from .mesh import (
     get_vertex_group_vertices,
-    update_vertex_positions
+    update_vertex_positions,
+    find_closest_vertex_indices,
+    get_vertex_data
 )
 from ..constants import ( 
     CUSTOM_BONE_SHAPE_NAME, 
@@ -46,6 +50,83 @@ def get_bone_rest_transformations(
 
     return rest_location, rest_rotation.to_euler('XYZ'), rest_scale, rest_to_parent_matrix # type: ignore
 
+def get_euler_rotation_matrices(rotations: np.ndarray) -> np.ndarray:
+    """
+    Converts an (N, 3) array of XYZ euler rotations in radians to an (N, 3, 3) 
+    array of rotation matrices. This matches the result of Euler.to_matrix().
+    """
+    cos_x, cos_y, cos_z = np.cos(rotations).T
+    sin_x, sin_y, sin_z = np.sin(rotations).T
+
+    matrices = np.empty((len(rotations), 3, 3), dtype=np.float64)
+    matrices[:, 0, 0] = cos_y * cos_z
+    matrices[:, 0, 1] = sin_y * sin_x * cos_z - cos_x * sin_z
+    matrices[:, 0, 2] = sin_y * cos_x * cos_z + sin_x * sin_z
+    matrices[:, 1, 0] = cos_y * sin_z
+    matrices[:, 1, 1] = sin_y * sin_x * sin_z + cos_x * cos_z
+    matrices[:, 1, 2] = sin_y * cos_x * sin_z - sin_x * cos_z
+    matrices[:, 2, 0] = -sin_y
+    matrices[:, 2, 1] = cos_y * sin_x
+    matrices[:, 2, 2] = cos_y * cos_x
+    return matrices
+
+def compose_matrices(
+        locations: np.ndarray, 
+        rotations: np.ndarray, 
+        scales: np.ndarray
+    ) -> np.ndarray:
+    """
+    Composes (N, 3) arrays of locations, XYZ euler rotations and scales into an 
+    (N, 4, 4) array of matrices. This matches the result of Matrix.LocRotScale().
+    """
+    matrices = np.zeros((len(locations), 4, 4), dtype=np.float64)
+    matrices[:, :3, :3] = get_euler_rotation_matrices(rotations) * scales[:, np.newaxis, :]
+    matrices[:, :3, 3] = locations
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+def decompose_matrices(matrices: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decomposes an (N, 4, 4) array of matrices into (N, 3) arrays of locations, XYZ 
+    euler rotations and scales. This matches how blender decomposes a matrix when 
+    it is assigned to PoseBone.matrix_basis.
+    """
+    locations = matrices[:, :3, 3].copy()
+    rotation_scales = matrices[:, :3, :3]
+
+    # the scale is the length of each column and is negated if the matrix is flipped
+    scales = np.linalg.norm(rotation_scales, axis=1)
+    scales[np.linalg.det(rotation_scales) < 0] *= -1
+    scales[scales == 0] = 1.0
+    rotation_matrices = rotation_scales / scales[:, np.newaxis, :]
+
+    # there are two possible euler solutions, so we pick the one with the smallest rotation
+    cos_y = np.hypot(rotation_matrices[:, 0, 0], rotation_matrices[:, 1, 0])
+    is_gimbal_locked = cos_y <= 16 * np.finfo(np.float32).eps
+
+    first = np.empty_like(locations)
+    first[:, 0] = np.where(
+        is_gimbal_locked, 
+        np.arctan2(-rotation_matrices[:, 1, 2], rotation_matrices[:, 1, 1]),
+        np.arctan2(rotation_matrices[:, 2, 1], rotation_matrices[:, 2, 2])
+    )
+    first[:, 1] = np.arctan2(-rotation_matrices[:, 2, 0], cos_y)
+    first[:, 2] = np.where(
+        is_gimbal_locked, 
+        0.0,
+        np.arctan2(rotation_matrices[:, 1, 0], rotation_matrices[:, 0, 0])
+    )
+
+    second = np.empty_like(locations)
+    second[:, 0] = np.arctan2(-rotation_matrices[:, 2, 1], -rotation_matrices[:, 2, 2])
+    second[:, 1] = np.arctan2(-rotation_matrices[:, 2, 0], -cos_y)
+    second[:, 2] = np.arctan2(-rotation_matrices[:, 1, 0], -rotation_matrices[:, 0, 0])
+    second[is_gimbal_locked] = first[is_gimbal_locked]
+
+    use_second = np.abs(first).sum(axis=1) > np.abs(second).sum(axis=1)
+    rotations = np.where(use_second[:, np.newaxis], second, first)
+    return locations, rotations, scales
+
 def get_bone_shape(name: str = CUSTOM_BONE_SHAPE_NAME):
     rotations = [
         [90, 0, 0],
@@ -249,28 +330,37 @@ def get_meshes_using_armature(armature_object: bpy.types.Object) -> list[bpy.typ
 def get_closet_vertex_to_bone(
         mesh_object: bpy.types.Object, 
         pose_bone: bpy.types.PoseBone,
-        max_distance: float = 0.01
+        max_distance: float = 0.01,
+        *,
+        kd_tree: KDTree
     ) -> bpy.types.MeshVertex | None:
+    """
+    Gets the vertex of the mesh that is closest to the bone. The KD-tree is the one from 
+    get_vertex_kd_tree for the mesh, so when querying several bones it is only built once.
+    """
     # get the bone applied position not the pose position
     bone = pose_bone.id_data.data.bones[pose_bone.name]
     position = mesh_object.matrix_world.inverted() @ bone.head_local
-    vert = min(
-        mesh_object.data.vertices,  # type: ignore
-        key=lambda vert: (position - vert.co).length_squared
-    )
-    distance = (position - vert.co).length_squared
+    _, index, distance = kd_tree.find(position)
+    # the mesh has no vertices
+    if index is None:
+        return None
+
+    distance = distance ** 2
     # only return the vertex if it is within the max distance
     if distance < max_distance:
-        return vert
-    logger.warning(f'Vertex {vert.index} is too far from bone "{pose_bone.name}":\n{distance} > {max_distance}')
+        return mesh_object.data.vertices[index] # type: ignore
+    logger.warning(f'Vertex {index} is too far from bone "{pose_bone.name}":\n{distance} > {max_distance}')
 
 
 def get_ray_cast_normal(
         mesh_object: bpy.types.Object, 
         pose_bone: bpy.types.PoseBone,
-        max_distance: float = 0.01
+        max_distance: float = 0.01,
+        *,
+        kd_tree: KDTree
     ) -> Vector | None:
-    vertex = get_closet_vertex_to_bone(mesh_object, pose_bone, max_distance)
+    vertex = get_closet_vertex_to_bone(mesh_object, pose_bone, max_distance, kd_tree=kd_tree)
     if vertex:
         return mesh_object.matrix_world @ vertex.normal
 
@@ -299,27 +389,24 @@ def get_closet_vertex_indices_to_bones(
     ) -> dict[str, int]:
     bone_to_vert_index = {}
 
-    # initialize the bmesh object to evaluate against the current depsgraph so 
-    # we get the correct vertex positions with taking into account modifiers
+    # query the evaluated vertex positions of the current depsgraph so we get the 
+    # correct vertex positions with taking into account modifiers
     depsgraph = bpy.context.evaluated_depsgraph_get() # type: ignore
-    bmesh_object = bmesh.new()
-    bmesh_object.from_object(mesh_object, depsgraph)
-    bmesh_object.verts.ensure_lookup_table()
+    closest_vertices = find_closest_vertex_indices(
+        mesh_object,
+        [pose_bone.matrix.translation for pose_bone in pose_bones],
+        depsgraph
+    )
 
-    for pose_bone in pose_bones:
-        position = pose_bone.matrix.translation
-        vert = min(
-            bmesh_object.verts,  # type: ignore
-            key=lambda vert: (position - vert.co).length_squared
-        )
+    for pose_bone, (index, distance) in zip(pose_bones, closest_vertices):
+        # the mesh has no vertices
+        if index is None:
+            break
         # only return the vertex if it is within the max distance
-        distance = (position - vert.co).length_squared
         if distance < max_distance:
-            bone_to_vert_index[pose_bone.name] = vert.index
+            bone_to_vert_index[pose_bone.name] = index
         else:
-            logger.warning(f'Vertex {vert.index} is too far from bone "{pose_bone.name}":\n{distance} > {max_distance}')
-
-    bmesh_object.free()
+            logger.warning(f'Vertex {index} is too far from bone "{pose_bone.name}":\n{distance} > {max_distance}')
 
     return bone_to_vert_index
 
@@ -327,13 +414,15 @@ def get_matching_vertex_index_location(
         source_mesh_object: bpy.types.Object, 
         target_mesh_object: bpy.types.Object, 
         pose_bone: bpy.types.PoseBone,
-        max_distance: float = 0.01
+        max_distance: float = 0.01,
+        *,
+        kd_tree: KDTree
     ) -> Vector | None:
     """
     Gets the location of the vertex on the target mesh that has the same index 
-    as the source mesh.
+    as the source mesh. The KD-tree is the one from get_vertex_kd_tree for the source mesh.
     """
-    vertex = get_closet_vertex_to_bone(source_mesh_object, pose_bone, max_distance)
+    vertex = get_closet_vertex_to_bone(source_mesh_object, pose_bone, max_distance, kd_tree=kd_tree)
     if not vertex:
         return None
 
@@ -458,10 +547,8 @@ def auto_fit_bones(
     ):
     import meta_human_dna_core
     from ..dna_io import DNAExporter
-    bmesh_object = DNAExporter.get_bmesh(mesh_object, rotation=0)
-    vertex_indices, vertex_positions = DNAExporter.get_mesh_vertex_positions(bmesh_object)
+    vertex_indices, vertex_positions = get_vertex_data(mesh_object)
     bone_data = DNAExporter.get_bone_transforms(armature_object)
-    bmesh_object.free()
 
     bone_names = []
     if only_selected:
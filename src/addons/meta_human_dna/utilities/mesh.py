@@ -4,9 +4,12 @@ import json
 import math
 import bmesh
 import logging
+import hashlib
+import numpy as np
 from pathlib import Path
+from collections import OrderedDict
 from mathutils import Vector, Matrix
-from bpy_extras.bmesh_utils import bmesh_linked_uv_islands
+from mathutils.kdtree import KDTree
 from .misc import (
     exclude_rig_logic_evaluation,
     switch_to_edit_mode,
@@ -19,7 +22,9 @@ from ..constants import (
     SHAPE_KEY_BASIS_NAME,
     HEAD_TO_BODY_EDGE_LOOP_FILE_PATH,
     NUMBER_OF_HEAD_LODS,
-    HEAD_TO_BODY_LOD_MAPPING
+    HEAD_TO_BODY_LOD_MAPPING,
+    SCALE_FACTOR,
+    VERTEX_KD_TREE_CACHE_MAX_COUNT
 )
 
 
@@ -383,12 +388,107 @@ def get_bounding_box_height(scene_object: bpy.types.Object) -> float:
     height = max(z_coords) - min(z_coords)
     return height
 
-def find_closest_vertex(vertices, position):
-    return min(
-        vertices,
-        key=lambda vert: (position - vert).length_squared
-    )
+_vertex_kd_trees = OrderedDict()
+
+def get_vertex_kd_tree(
+        mesh_object: bpy.types.Object,
+        depsgraph: bpy.types.Depsgraph | None = None
+    ) -> KDTree:
+    """
+    Gets a KD-tree of the object space vertex positions of the mesh. When a depsgraph is given, the 
+    evaluated vertex positions are used, so modifiers are taken into account. The trees of the most 
+    recently used meshes are cached by object name and are only rebuilt when their vertex positions 
+    change. Reading the positions to check them is linear in the vertex count, so callers that query 
+    many positions should get the tree once and pass it on.
+    """
+    if depsgraph:
+        evaluated_object = mesh_object.evaluated_get(depsgraph)
+        mesh = evaluated_object.to_mesh()
+        positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get('co', positions)
+        evaluated_object.to_mesh_clear()
+    else:
+        vertices = mesh_object.data.vertices # type: ignore
+        positions = np.empty(len(vertices) * 3, dtype=np.float32)
+        vertices.foreach_get('co', positions)
+
+    key = (mesh_object.name, bool(depsgraph))
+    fingerprint = hashlib.sha1(positions.tobytes()).hexdigest()
+    cached = _vertex_kd_trees.get(key)
+    if cached and cached[0] == fingerprint:
+        _vertex_kd_trees.move_to_end(key)
+        return cached[1]
+
+    positions = positions.reshape(-1, 3)
+    kd_tree = KDTree(len(positions))
+    for index, position in enumerate(positions):
+        kd_tree.insert(position, index)
+    kd_tree.balance()
+    _vertex_kd_trees[key] = (fingerprint, kd_tree)
+    _vertex_kd_trees.move_to_end(key)
+    # evict the least recently used trees, so the trees of deleted or renamed meshes are freed
+    while len(_vertex_kd_trees) > VERTEX_KD_TREE_CACHE_MAX_COUNT:
+        _vertex_kd_trees.popitem(last=False)
+    return kd_tree
+
+def clear_vertex_kd_trees():
+    """
+    Removes the cached KD-trees, so the trees of meshes that were deleted are freed.
+    """
+    _vertex_kd_trees.clear()
+
+def find_closest_vertex_indices(
+        mesh_object: bpy.types.Object,
+        positions: list[Vector],
+        depsgraph: bpy.types.Depsgraph | None = None
+    ) -> list[tuple[int, float]]:
+    """
+    Finds the closest vertex of the mesh to each of the given object space positions.
+
+    Returns:
+        list[tuple[int, float]]: The vertex index and squared distance for each position. These are 
+        None and infinity when the mesh has no vertices.
+    """
+    kd_tree = get_vertex_kd_tree(mesh_object, depsgraph)
+    results = []
+    for position in positions:
+        _, index, distance = kd_tree.find(position)
+        if index is None:
+            results.append((None, math.inf))
+        else:
+            results.append((index, distance ** 2))
+    return results
     
+def get_vertex_data(mesh_object: bpy.types.Object) -> tuple[list[int], list[list[float]]]:
+    """
+    Gets the vertex indices and the vertex positions scaled to DNA units.
+    """
+    mesh: bpy.types.Mesh = mesh_object.data # type: ignore
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', positions)
+    positions = positions.reshape(-1, 3).astype(np.float64) * SCALE_FACTOR
+    return list(range(len(mesh.vertices))), positions.tolist()
+
+def get_vertex_uv_data(mesh_object: bpy.types.Object) -> tuple[list[int], list[list[float]]]:
+    """
+    Gets the index of the last loop that uses each vertex, and the uvs of all the loops.
+    """
+    mesh: bpy.types.Mesh = mesh_object.data # type: ignore
+    if not mesh.uv_layers.active:
+        return [], []
+
+    loop_count = len(mesh.loops)
+    loop_vertex_indices = np.empty(loop_count, dtype=np.int64)
+    mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+    loop_uvs = np.empty(loop_count * 2, dtype=np.float32)
+    mesh.uv_layers.active.uv.foreach_get('vector', loop_uvs)
+
+    # the first occurrence in the reversed loops is the last loop of each vertex
+    uv_indices = np.arange(len(mesh.vertices))
+    vertex_indices, reversed_loop_indices = np.unique(loop_vertex_indices[::-1], return_index=True)
+    uv_indices[vertex_indices] = loop_count - 1 - reversed_loop_indices
+    return uv_indices.tolist(), loop_uvs.reshape(-1, 2).tolist()
+
 @exclude_rig_logic_evaluation
 def copy_mesh(
         mesh_object: bpy.types.Object, 
@@ -434,52 +534,6 @@ def copy_mesh(
 
     return mesh_object_copy
 
-def split_mesh_along_uv_islands(bmesh_object: bmesh.types.BMesh) -> dict[int, int]:
-    uv_layer = bmesh_object.loops.layers.uv.active
-    _uv_border_verts = []
-
-    if not uv_layer:
-        return {}    
-
-    # get each uv island and it's loops
-    for island_faces in bmesh_linked_uv_islands(bmesh_object, uv_layer):        
-        island_loops = [loop for face in island_faces for loop in face.loops] # type: ignore
-        for loop in island_loops:
-            # Select border loops on the island
-            loops = (loop, loop.link_loop_radial_next)
-            if (loops[0] == loops[1]
-                or loops[1].face not in island_faces
-                or loops[0][uv_layer].uv != loops[1].link_loop_next[uv_layer].uv
-                or loops[1][uv_layer].uv != loops[0].link_loop_next[uv_layer].uv):
-                _uv_border_verts.append(loop.vert)
-
-    uv_border_edges = []
-    uv_border_verts = []
-    for edge in bmesh_object.edges:
-        if not edge.is_boundary and all(vert in _uv_border_verts for vert in edge.verts):
-            uv_border_edges.append(edge)
-            uv_border_verts.extend(list(edge.verts))
-
-    # Split those edges
-    split = bmesh.ops.split_edges(bmesh_object, edges=uv_border_edges)
-    
-    bmesh_object.verts.index_update()
-    bmesh_object.faces.index_update()
-    bmesh_object.verts.ensure_lookup_table()
-    bmesh_object.faces.ensure_lookup_table()
-    
-    # Create a lookup table so we can map the new verts to the original verts
-    # sharing the same position.
-    split_to_original_vert_lookup = {}
-    for edge in split['edges']:
-        for vert in edge.verts:
-            for _vert in uv_border_verts:
-                if vert.co == _vert.co:
-                    split_to_original_vert_lookup[vert.index] = _vert.index
-                    
-    return split_to_original_vert_lookup
-
-
 def save_topology_vertex_groups(mesh_object: bpy.types.Object, file_path: Path):
     vertex_groups = {}
     for vertex_group in mesh_object.vertex_groups:
@@ -540,6 +594,58 @@ def get_head_to_body_edge_loop_mapping() -> dict[str, dict[int, int]]:
     with open(HEAD_TO_BODY_EDGE_LOOP_FILE_PATH, 'r') as file:
         return json.load(file)
 
+def get_skin_weights(
+        mesh_object: bpy.types.Object,
+        group_joint_indices: np.ndarray | None = None,
+        max_influences: int = 0,
+        normalize: bool = False
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gets the vertex group weights of every vertex as a CSR table, in a single pass over the vertex 
+    groups of each vertex. The influences of vertex i are offsets[i]:offsets[i + 1] in the indices 
+    and weights arrays.
+
+    The indices are the vertex group indices, or the joint indices they map to in group_joint_indices. 
+    Groups mapped to a negative joint index and weights that are not above zero are left out. Each 
+    vertex can be limited to its max_influences largest weights, and have its weights normalized.
+    """
+    vertices = mesh_object.data.vertices # type: ignore
+    vertex_count = len(vertices)
+    counts = np.empty(vertex_count, dtype=np.int64)
+    group_indices = []
+    weights = []
+    for vertex_index, vertex in enumerate(vertices):
+        groups = vertex.groups
+        counts[vertex_index] = len(groups)
+        for group in groups:
+            group_indices.append(group.group)
+            weights.append(group.weight)
+
+    rows = np.repeat(np.arange(vertex_count), counts)
+    indices = np.array(group_indices, dtype=np.int64)
+    weights = np.array(weights, dtype=np.float64)
+    if group_joint_indices is not None:
+        indices = np.asarray(group_joint_indices, dtype=np.int64)[indices]
+
+    keep = (indices >= 0) & (weights > 0)
+    rows, indices, weights = rows[keep], indices[keep], weights[keep]
+
+    if max_influences > 0:
+        # order the influences of each vertex from the largest weight, and keep the first ones
+        order = np.lexsort((-weights, rows))
+        rows, indices, weights = rows[order], indices[order], weights[order]
+        row_starts = np.searchsorted(rows, np.arange(vertex_count))
+        keep = np.arange(len(rows)) - row_starts[rows] < max_influences
+        rows, indices, weights = rows[keep], indices[keep], weights[keep]
+
+    if normalize:
+        totals = np.bincount(rows, weights=weights, minlength=vertex_count)
+        weights = weights / totals[rows]
+
+    offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=vertex_count), out=offsets[1:])
+    return offsets, indices, weights
+
 def get_vertex_group_vertices(
         mesh_object: bpy.types.Object, 
         vertex_group_name: str,
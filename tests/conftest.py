@@ -79,12 +79,12 @@ def pytest_configure():
 from fixtures.addon import addon  # noqa: E402, F401
 from fixtures.dna_data import ( # noqa: E402, F401
     original_dna_json_data,
+    exported_dna_file_path,
     exported_dna_json_data,
     calibrated_dna_json_data
 )
 from fixtures.scene import (  # noqa: E402, F401
     load_dna,
-    head_bmesh,
     head_armature,
     modify_scene
 )
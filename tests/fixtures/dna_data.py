@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import pytest
 from constants import TEST_DNA_FOLDER
 
@@ -12,19 +14,17 @@ def original_dna_json_data(temp_folder, dna_folder_name: str) -> dict:
 
 
 @pytest.fixture(scope="session")
-def exported_dna_json_data(
+def exported_dna_file_path(
     modify_scene,
     temp_folder,
     dna_folder_name: str
-) -> dict:
-    from utilities.dna_data import get_dna_json_data
-    from meta_human_dna.utilities import get_active_head
+) -> Path | None:
     from meta_human_dna.dna_io import DNAExporter
+    from meta_human_dna.utilities import get_active_head
 
     head = get_active_head()
     export_folder = temp_folder / "export" / dna_folder_name
     dna_file_path = export_folder / "head.dna"
-    json_file_path = export_folder / "head.json"
     export_folder.mkdir(parents=True, exist_ok=True)
 
     if head and head.rig_logic_instance:
@@ -34,7 +34,16 @@ def exported_dna_json_data(
             instance=head.rig_logic_instance, 
             linear_modifier=head.linear_modifier
         ).run()
-        return get_dna_json_data(dna_file_path, json_file_path)
+        return dna_file_path
+
+
+@pytest.fixture(scope="session")
+def exported_dna_json_data(exported_dna_file_path: Path | None) -> dict:
+    from utilities.dna_data import get_dna_json_data
+
+    if exported_dna_file_path:
+        json_file_path = exported_dna_file_path.with_suffix('.json')
+        return get_dna_json_data(exported_dna_file_path, json_file_path)
 
     return {}
 
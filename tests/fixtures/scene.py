@@ -1,5 +1,4 @@
 import bpy
-import bmesh
 import pytest
 from mathutils import Vector, Euler
 from constants import TEST_DNA_FOLDER
@@ -33,14 +32,6 @@ def load_dna(
         **lods_to_import
     )
 
-@pytest.fixture(scope='session')
-def head_bmesh(load_dna) -> bmesh.types.BMesh | None:
-    from meta_human_dna.utilities import get_active_head
-    from meta_human_dna.dna_io.exporter import DNAExporter
-    head = get_active_head()
-    if head and head.head_mesh_object:
-        return DNAExporter.get_bmesh(head.head_mesh_object)
-
 @pytest.fixture(scope='session')
 def head_armature(load_dna) -> bpy.types.Object | None:
     from meta_human_dna.utilities import get_active_head
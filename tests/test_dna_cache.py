@@ -0,0 +1,112 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+from constants import HEAD_DNA_FILE
+
+
+def get_head_mesh_index(reader) -> int:
+    return next(iter(reader.getMeshIndicesForLOD(0)))
+
+
+def test_blend_shape_target_deltas_cache(addon, tmp_path: Path):
+    from meta_human_dna.dna_io import get_dna_reader
+    from meta_human_dna.dna_io.misc import (
+        get_blend_shape_target_deltas,
+        read_blend_shape_target_deltas,
+    )
+
+    reader = get_dna_reader(file_path=HEAD_DNA_FILE, file_format='binary')
+    mesh_index = get_head_mesh_index(reader)
+    expected = read_blend_shape_target_deltas(reader, mesh_index)
+
+    # the first call reads the deltas from the DNA and writes them to the cache
+    target_deltas = get_blend_shape_target_deltas(reader, mesh_index, file_path=HEAD_DNA_FILE, cache_folder=tmp_path)
+    cache_files = sorted(tmp_path.glob(f'*_mesh{mesh_index}_*.npy'))
+    assert len(cache_files) == 3, 'The deltas of the mesh were not written to the cache'
+    assert not list(tmp_path.glob('*.tmp')), 'Temporary cache files were left behind'
+
+    # the second call memory maps the cached deltas
+    cached_target_deltas = get_blend_shape_target_deltas(reader, mesh_index, file_path=HEAD_DNA_FILE, cache_folder=tmp_path)
+    for name, value in expected.items():
+        assert np.array_equal(target_deltas[name], value)
+        assert isinstance(cached_target_deltas[name], np.memmap), f'The cached "{name}" are not memory mapped'
+        assert np.array_equal(cached_target_deltas[name], value)
+
+
+def test_blend_shape_target_deltas_cache_keeps_new_files(addon, tmp_path: Path):
+    from meta_human_dna.dna_io import get_dna_reader
+    from meta_human_dna.dna_io.misc import get_blend_shape_target_deltas
+
+    reader = get_dna_reader(file_path=HEAD_DNA_FILE, file_format='binary')
+    mesh_index = get_head_mesh_index(reader)
+
+    # an older cache file is evicted, but the files just written are kept even though they exceed the max size
+    old_cache_file = tmp_path / 'old_lod0_mesh0_deltas.npy'
+    np.save(old_cache_file, np.zeros(16))
+    os.utime(old_cache_file, (0, 0))
+    get_blend_shape_target_deltas(reader, mesh_index, file_path=HEAD_DNA_FILE, cache_folder=tmp_path, max_cache_size=1)
+
+    assert not old_cache_file.exists(), 'The least recently used cache file was not evicted'
+    assert len(list(tmp_path.glob(f'*_mesh{mesh_index}_*.npy'))) == 3, 'The cache files that were just written were evicted'
+
+
+def test_evict_cache_files(tmp_path: Path):
+    from meta_human_dna.dna_io.misc import evict_cache_files
+
+    cache_files = []
+    for index in range(3):
+        cache_file = tmp_path / f'{index}.npy'
+        np.save(cache_file, np.zeros(1024, dtype=np.float32))
+        os.utime(cache_file, (index, index))
+        cache_files.append(cache_file)
+
+    # only the most recently used file fits, the oldest one is kept because it was asked to be
+    evict_cache_files(tmp_path, max_size=cache_files[2].stat().st_size * 2, keep=[cache_files[0]])
+    assert [cache_file.exists() for cache_file in cache_files] == [True, False, True]
+
+
+def test_dna_reader_cache(addon, tmp_path: Path):
+    from meta_human_dna.dna_io import get_dna_reader
+    from meta_human_dna.dna_io.misc import clear_dna_reader_cache
+
+    clear_dna_reader_cache()
+    file_path = shutil.copy(HEAD_DNA_FILE, tmp_path / 'head.dna')
+    other_file_path = shutil.copy(HEAD_DNA_FILE, tmp_path / 'other_head.dna')
+
+    # a reader is reused for the same file and data layer
+    reader = get_dna_reader(file_path=file_path, data_layer='Definition')
+    assert get_dna_reader(file_path=file_path, data_layer='Definition') is reader
+    # but not for another file, a wider data layer or when the cache is not used
+    assert get_dna_reader(file_path=other_file_path, data_layer='Definition') is not reader
+    assert get_dna_reader(file_path=file_path, data_layer='Definition', use_cache=False) is not reader
+    wider_reader = get_dna_reader(file_path=file_path, data_layer='All')
+    assert wider_reader is not reader
+
+    # the reader of the wider data layer satisfies the narrower ones
+    for data_layer in ('Descriptor', 'Definition', 'Behavior', 'Geometry', 'AllWithoutBlendShapes'):
+        assert get_dna_reader(file_path=file_path, data_layer=data_layer) is wider_reader, (
+            f'The reader of the "All" data layer was not reused for the "{data_layer}" data layer'
+        )
+
+
+def test_dna_reader_cache_invalidation(addon, tmp_path: Path):
+    from meta_human_dna.dna_io import get_dna_reader
+    from meta_human_dna.dna_io.misc import clear_dna_reader_cache
+
+    clear_dna_reader_cache()
+    file_path = shutil.copy(HEAD_DNA_FILE, tmp_path / 'head.dna')
+    reader = get_dna_reader(file_path=file_path, data_layer='Definition')
+
+    # rewriting the file changes its modification time, so it is read again
+    shutil.copy(HEAD_DNA_FILE, file_path)
+    stat = os.stat(file_path)
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    rewritten_reader = get_dna_reader(file_path=file_path, data_layer='Definition')
+    assert rewritten_reader is not reader, 'The reader of the rewritten file was not read again'
+    assert get_dna_reader(file_path=file_path, data_layer='Definition') is rewritten_reader
+
+    # clearing the cache reads the file again
+    clear_dna_reader_cache()
+    assert get_dna_reader(file_path=file_path, data_layer='Definition') is not rewritten_reader
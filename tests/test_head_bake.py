@@ -0,0 +1,69 @@
+import bpy
+import pytest
+from bpy_extras.anim_utils import action_get_channelbag_for_slot
+from constants import TEST_FILES_FOLDER
+from meta_human_dna.ui.callbacks import (
+    get_active_rig_logic,
+    get_head_texture_logic_node,
+)
+from meta_human_dna.utilities import bake_to_action, get_active_head
+
+FACE_BOARD_ANIMATION_FILE = TEST_FILES_FOLDER / 'animation' / 'head' / 'MHC_FaceROM.fbx'
+
+
+def get_baked_keys(id_data: bpy.types.ID) -> dict[tuple[str, int], list[tuple[float, float]]]:
+    keys = {}
+    animation_data = id_data.animation_data
+    if not animation_data:
+        return keys
+
+    channelbag = action_get_channelbag_for_slot(animation_data.action, animation_data.action_slot)
+    if channelbag:
+        for fcurve in channelbag.fcurves:
+            keys[(fcurve.data_path, fcurve.array_index)] = [
+                tuple(keyframe.co) for keyframe in fcurve.keyframe_points
+            ]
+
+    # clear the baked action so the next bake starts from an empty action
+    animation_data.action = None
+    return keys
+
+
+@pytest.mark.parametrize('step', [1, 2])
+def test_fast_bake_matches_legacy_bake(load_dna, step: int):
+    head = get_active_head()
+    instance = get_active_rig_logic()
+    assert head and instance, 'No active rig logic found'
+    head.import_action(FACE_BOARD_ANIMATION_FILE)
+    texture_logic_node = get_head_texture_logic_node(instance.head_material)
+
+    baked_keys = {}
+    for fast in (False, True):
+        bake_to_action(
+            armature_object=instance.head_rig,
+            action_name=f'baked_{step}_{fast}',
+            start_frame=3,
+            end_frame=12,
+            step=step,
+            clean_curves=False,
+            masks=True,
+            shape_keys=False,
+            fast=fast
+        )
+        baked_keys[fast] = {
+            'bones': get_baked_keys(instance.head_rig),
+            'masks': get_baked_keys(texture_logic_node.id_data) if texture_logic_node else {}
+        }
+
+    for name in ('bones', 'masks'):
+        legacy_keys = baked_keys[False][name]
+        fast_keys = baked_keys[True][name]
+        assert fast_keys or not legacy_keys, f'No {name} keys were baked by the fast bake'
+        for curve, keys in fast_keys.items():
+            assert curve in legacy_keys, f'The legacy bake did not bake the curve {curve}'
+            assert [frame for frame, _ in keys] == [frame for frame, _ in legacy_keys[curve]], (
+                f'The baked frames of the curve {curve} do not match'
+            )
+            assert [value for _, value in keys] == pytest.approx([value for _, value in legacy_keys[curve]], abs=1e-3), (
+                f'The baked values of the curve {curve} do not match'
+            )
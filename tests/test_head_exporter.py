@@ -1,8 +1,14 @@
+import bpy
 import pytest
+import numpy as np
+from pathlib import Path
 from mathutils import Euler, Vector
 from utilities.dna_data import (
     get_test_bone_definitions_params, 
-    get_test_mesh_geometry_params
+    get_test_mesh_geometry_params,
+    get_dna_mesh_geometry,
+    get_blender_mesh_geometry,
+    get_dna_skin_weights
 )
 from utilities.assertions import (
     assert_bone_definitions, 
@@ -13,6 +19,7 @@ from constants import (
     HEAD_DNA_FILE, 
     IGNORED_BONE_ROTATIONS_ON_EXPORT
 )
+from meta_human_dna.utilities import get_active_head
 
 @pytest.mark.parametrize(
     ('bone_name', 'attribute', 'axis_name'),
@@ -76,4 +83,92 @@ def test_mesh_geometry(
         assert_index_order=False,
         tolerance=TOLERANCE[attribute],
         output_method='export'
-    )
\ No newline at end of file
+    )
+
+
+def test_exported_mesh_geometry(
+    exported_dna_file_path: Path | None,
+    dna_folder_name: str,
+    changed_head_mesh_name: str,
+    changed_head_vertex_index: int
+):
+    head = get_active_head()
+    assert head and exported_dna_file_path, 'The DNA was not exported'
+    mesh_object = bpy.data.objects[f'{dna_folder_name}_{changed_head_mesh_name}']
+
+    expected = get_dna_mesh_geometry(HEAD_DNA_FILE, changed_head_mesh_name)
+    current = get_dna_mesh_geometry(exported_dna_file_path, changed_head_mesh_name)
+    scene = get_blender_mesh_geometry(mesh_object, head.linear_modifier)
+
+    # the faces are exported in the same order, and the positions in the order of the imported vertices
+    assert np.array_equal(current['face_sizes'], expected['face_sizes'])
+    assert np.array_equal(
+        expected['vertex_position_indices'][current['corner_position_indices']], 
+        expected['corner_position_indices']
+    )
+    assert np.allclose(current['corner_uvs'], expected['corner_uvs'], atol=TOLERANCE['textureCoordinates'])
+
+    # the changed vertex is moved by the scene modifications
+    positions = expected['positions'][expected['vertex_position_indices']]
+    unchanged = np.arange(len(positions)) != changed_head_vertex_index
+    assert len(current['positions']) == len(positions)
+    assert np.allclose(current['positions'][unchanged], positions[unchanged], atol=TOLERANCE['positions'])
+
+    # the normals are exported from the scene with the same scale as the positions
+    normals = current['corner_normals'] / np.linalg.norm(current['corner_normals'], axis=1, keepdims=True)
+    assert np.allclose(normals, scene['corner_normals'], atol=TOLERANCE['normals'])
+
+
+def test_exported_skin_weights(
+    exported_dna_file_path: Path | None,
+    changed_head_mesh_name: str
+):
+    assert exported_dna_file_path, 'The DNA was not exported'
+
+    expected = get_dna_skin_weights(HEAD_DNA_FILE, changed_head_mesh_name)
+    current = get_dna_skin_weights(exported_dna_file_path, changed_head_mesh_name)
+
+    assert current.keys() == expected.keys(), 'The exported skin weight influences do not match the DNA skin weights'
+    for key, weight in expected.items():
+        assert abs(current[key] - weight) < 1e-6, f'The exported weight of {key} does not match the DNA skin weight'
+
+
+def test_dna_mesh_data_layouts():
+    from meta_human_dna.dna_io import DNAExporter
+
+    # a strip of quads with a uv seam, negative and signed zero uvs
+    loop_vertex_indices = np.array([0, 1, 3, 2, 1, 4, 5, 3, 4, 6, 7, 5], dtype=np.int32)
+    loop_uvs = np.array([
+        [0.0, 0.0], [0.5, 0.0], [0.5, 1.0], [0.0, 1.0],
+        [0.5, 0.0], [1.0, 0.0], [1.0, 1.0], [0.5, 1.0],
+        [1.0, -0.0], [-0.5, 0.0], [-0.5, 1.0], [-1.0, 1.0],
+    ], dtype=np.float32)
+    mesh_data = DNAExporter.get_dna_mesh_data(
+        vertex_positions=np.zeros((8, 3), dtype=np.float32),
+        loop_vertex_indices=loop_vertex_indices,
+        polygon_loop_starts=np.array([0, 4, 8], dtype=np.int32),
+        polygon_loop_totals=np.array([4, 4, 4], dtype=np.int32),
+        corner_normals=np.tile(np.array([0.0, 0.0, 1.0], dtype=np.float32), (12, 1)),
+        loop_uvs=loop_uvs,
+        loop_colors=None
+    )
+
+    # there is a layout for each unique vertex and uv pair, in the order of the pairs
+    uvs = loop_uvs + 0.0
+    pairs, layout_loop_indices = np.unique(
+        np.column_stack((loop_vertex_indices, uvs)), 
+        axis=0, 
+        return_index=True
+    )
+    layouts = np.array(mesh_data['layouts'])
+    exported_uvs = np.array(mesh_data['uvs'], dtype=np.float32)
+    assert len(layouts) == 9
+    assert np.array_equal(layouts[:, 0], pairs[:, 0])
+    assert np.array_equal(exported_uvs, uvs[layout_loop_indices])
+    assert not np.signbit(exported_uvs[exported_uvs == 0]).any()
+
+    # each face corner uses the layout of its vertex and uv, and -0.0 and 0.0 share a layout
+    face_layout_indices = np.array([index for _, face in mesh_data['faces'] for index in face])
+    assert np.array_equal(layouts[face_layout_indices, 0], loop_vertex_indices)
+    assert np.array_equal(exported_uvs[face_layout_indices], uvs)
+    assert face_layout_indices[5] == face_layout_indices[8]
@@ -0,0 +1,130 @@
+import math
+
+import bpy
+import numpy as np
+from constants import HEAD_DNA_FILE, TOLERANCE
+from mathutils import Matrix
+from meta_human_dna.utilities import get_active_head
+from utilities.dna_data import (
+    get_blender_mesh_geometry,
+    get_blender_skin_weights,
+    get_dna_mesh_geometry,
+    get_dna_skin_weights,
+)
+
+
+def test_imported_mesh_geometry(
+    load_dna,
+    dna_folder_name: str,
+    changed_head_mesh_name: str,
+    changed_head_vertex_index: int
+):
+    head = get_active_head()
+    assert head, 'No active head found'
+    mesh_object = bpy.data.objects[f'{dna_folder_name}_{changed_head_mesh_name}']
+
+    expected = get_dna_mesh_geometry(HEAD_DNA_FILE, changed_head_mesh_name)
+    current = get_blender_mesh_geometry(mesh_object, head.linear_modifier)
+
+    # the faces are created in the DNA order with the same vertex layouts
+    assert np.array_equal(current['face_sizes'], expected['face_sizes'])
+    assert np.array_equal(
+        expected['vertex_position_indices'][current['corner_position_indices']], 
+        expected['corner_position_indices']
+    )
+    assert np.allclose(current['corner_uvs'], expected['corner_uvs'], atol=TOLERANCE['textureCoordinates'])
+
+    # the changed vertex is moved by the scene modifications of other tests
+    positions = expected['positions'][expected['vertex_position_indices']]
+    unchanged = np.arange(len(positions)) != changed_head_vertex_index
+    assert np.allclose(current['positions'][unchanged], positions[unchanged], atol=TOLERANCE['positions'])
+
+    # the imported custom normals are normalized
+    if mesh_object.data.has_custom_normals: # type: ignore
+        normals = expected['corner_normals'] / np.linalg.norm(expected['corner_normals'], axis=1, keepdims=True)
+        assert np.allclose(current['corner_normals'], normals, atol=TOLERANCE['normals'])
+
+
+def test_imported_vertex_groups(
+    load_dna,
+    dna_folder_name: str,
+    changed_head_mesh_name: str
+):
+    mesh_object = bpy.data.objects[f'{dna_folder_name}_{changed_head_mesh_name}']
+
+    expected = get_dna_skin_weights(HEAD_DNA_FILE, changed_head_mesh_name)
+    current = get_blender_skin_weights(mesh_object)
+
+    assert current.keys() == expected.keys(), 'The imported vertex group influences do not match the DNA skin weights'
+    for key, weight in expected.items():
+        assert abs(current[key] - weight) < 1e-6, f'The imported weight of {key} does not match the DNA skin weight'
+
+
+def test_created_shape_key_deltas(
+    load_dna,
+    dna_folder_name: str,
+    changed_head_mesh_name: str
+):
+    from meta_human_dna.dna_io import (
+        create_shape_key,
+        get_blend_shape_target_deltas,
+        get_dna_reader,
+    )
+    from meta_human_dna.utilities import initialize_basis_shape_key
+
+    head = get_active_head()
+    assert head, 'No active head found'
+    reader = get_dna_reader(file_path=HEAD_DNA_FILE, file_format='binary', use_cache=False)
+    mesh_index = [reader.getMeshName(index) for index in range(reader.getMeshCount())].index(changed_head_mesh_name)
+    target_deltas = get_blend_shape_target_deltas(reader, mesh_index)
+
+    # create the shape keys on a copy, so the imported mesh is left untouched
+    source_object = bpy.data.objects[f'{dna_folder_name}_{changed_head_mesh_name}']
+    mesh_object = source_object.copy()
+    mesh_object.data = source_object.data.copy()
+    bpy.context.collection.objects.link(mesh_object) # type: ignore
+    try:
+        initialize_basis_shape_key(mesh_object)
+        vertex_count = len(mesh_object.data.vertices) # type: ignore
+        basis = np.empty(vertex_count * 3, dtype=np.float32)
+        mesh_object.data.vertices.foreach_get('co', basis) # type: ignore
+        # Blender is Z-up, DNA is Y-up
+        rotation_matrix = np.array(Matrix.Rotation(math.radians(-90), 3, 'X'))
+
+        for index in range(min(reader.getBlendShapeTargetCount(mesh_index), 5)):
+            name = reader.getBlendShapeChannelName(reader.getBlendShapeChannelIndex(mesh_index, index))
+            start, end = target_deltas['offsets'][index:index + 2]
+            for kwargs in (
+                {},
+                {
+                    'vertex_indices': target_deltas['vertex_indices'][start:end], 
+                    'deltas': target_deltas['deltas'][start:end]
+                }
+            ):
+                shape_key_block = create_shape_key(
+                    index=index,
+                    mesh_index=mesh_index,
+                    mesh_object=mesh_object,
+                    reader=reader,
+                    name=name,
+                    linear_modifier=head.linear_modifier,
+                    **kwargs
+                )
+                assert shape_key_block, f'The shape key "{name}" was not created'
+                positions = np.empty(vertex_count * 3, dtype=np.float32)
+                shape_key_block.data.foreach_get('co', positions)
+                deltas = ((positions - basis).reshape(-1, 3) @ rotation_matrix.T) / head.linear_modifier
+
+                expected = np.zeros((vertex_count, 3))
+                expected[np.asarray(reader.getBlendShapeTargetVertexIndices(mesh_index, index), dtype=np.int64)] = np.column_stack((
+                    reader.getBlendShapeTargetDeltaXs(mesh_index, index),
+                    reader.getBlendShapeTargetDeltaYs(mesh_index, index),
+                    reader.getBlendShapeTargetDeltaZs(mesh_index, index)
+                ))
+                assert np.allclose(deltas, expected, atol=TOLERANCE['positions']), (
+                    f'The deltas of the shape key "{name}" do not match the DNA blend shape target'
+                )
+    finally:
+        mesh = mesh_object.data
+        bpy.data.objects.remove(mesh_object)
+        bpy.data.meshes.remove(mesh) # type: ignore
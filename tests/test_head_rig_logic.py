@@ -3,6 +3,7 @@ import bpy
 import math
 import json
 import pytest
+import numpy as np
 from mathutils import Vector
 from pathlib import Path
 from pprint import pformat
@@ -242,4 +243,29 @@ def test_active_face_material(load_dna, enum_index, active_face_material_name):
     (
         f'The active face material should be "{enum_index}" '
         f'but is "{instance.active_face_material}"'
-    )
\ No newline at end of file
+    )
+
+def test_calculate_head_outputs(load_dna):
+    instance = get_active_rig_logic()
+    assert instance, 'No active rig logic found'
+
+    # set a pose so the gui controls have non-zero values
+    pose_name = get_all_pose_names()[0]
+    bpy.context.window_manager.meta_human_dna.face_pose_previews = str(POSES_FOLDER / pose_name / "thumbnail-preview.png") # type: ignore
+    gui_control_values = instance.data['head_gui_control_values']
+
+    # evaluating the same values offline should match the interactive evaluation
+    outputs = instance.calculate_head_outputs(gui_control_values=[gui_control_values, gui_control_values * 0])
+    assert outputs['joint_outputs'].shape[0] == 2
+    assert outputs['joint_outputs'].shape[2] == 9
+    assert list(outputs['joint_outputs'][0].ravel()) == pytest.approx(list(instance.head_instance.getRawJointOutputs()), abs=1e-5)
+    assert list(outputs['blend_shape_outputs'][0]) == pytest.approx(list(instance.head_instance.getBlendShapeOutputs()), abs=1e-5)
+    assert list(outputs['animated_map_outputs'][0]) == pytest.approx(list(instance.head_instance.getAnimatedMapOutputs()), abs=1e-5)
+
+def test_calculate_head_outputs_frame_count_mismatch(load_dna):
+    instance = get_active_rig_logic()
+    assert instance, 'No active rig logic found'
+
+    gui_control_values = np.zeros((3, len(instance.head_gui_control_lookup['axes'])), dtype=np.float32)
+    with pytest.raises(ValueError):
+        instance.calculate_head_outputs(frames=[1, 2], gui_control_values=gui_control_values)
\ No newline at end of file
@@ -1,4 +1,8 @@
 import json
+import math
+import bpy
+import numpy as np
+from mathutils import Matrix
 from constants import SAMPLE_DNA_FILE
 from pathlib import Path
 
@@ -88,4 +92,111 @@ def get_test_mesh_geometry_params(
                 axis_names = ['u', 'v']
 
             for axis_name in axis_names:
-                yield mesh_name, attribute, axis_name
\ No newline at end of file
+                yield mesh_name, attribute, axis_name
+
+
+def get_dna_mesh_geometry(dna_file_path: Path, mesh_name: str) -> dict[str, np.ndarray]:
+    """
+    Reads the geometry of the mesh in the DNA file as arrays. The uvs and normals are 
+    per face corner, in the order of the faces and their vertex layouts.
+    """
+    from meta_human_dna.dna_io import get_dna_reader
+    reader = get_dna_reader(file_path=dna_file_path, file_format='binary', use_cache=False)
+    mesh_index = [reader.getMeshName(index) for index in range(reader.getMeshCount())].index(mesh_name)
+
+    faces = [
+        list(reader.getFaceVertexLayoutIndices(mesh_index, index)) 
+        for index in range(reader.getFaceCount(mesh_index))
+    ]
+    corner_layout_indices = np.array([index for face in faces for index in face], dtype=np.int64)
+    position_indices = np.array(reader.getVertexLayoutPositionIndices(mesh_index), dtype=np.int64)
+    uv_indices = np.array(reader.getVertexLayoutTextureCoordinateIndices(mesh_index), dtype=np.int64)
+    normal_indices = np.array(reader.getVertexLayoutNormalIndices(mesh_index), dtype=np.int64)
+
+    uvs = np.column_stack((
+        reader.getVertexTextureCoordinateUs(mesh_index),
+        reader.getVertexTextureCoordinateVs(mesh_index)
+    ))
+    normals = np.column_stack((
+        reader.getVertexNormalXs(mesh_index),
+        reader.getVertexNormalYs(mesh_index),
+        reader.getVertexNormalZs(mesh_index)
+    ))
+    return {
+        'positions': np.column_stack((
+            reader.getVertexPositionXs(mesh_index),
+            reader.getVertexPositionYs(mesh_index),
+            reader.getVertexPositionZs(mesh_index)
+        )),
+        # the importer creates a vertex for each position used by a vertex layout
+        'vertex_position_indices': np.unique(position_indices),
+        'face_sizes': np.array([len(face) for face in faces], dtype=np.int64),
+        'corner_position_indices': position_indices[corner_layout_indices],
+        'corner_uvs': uvs[uv_indices[corner_layout_indices]],
+        'corner_normals': normals[normal_indices[corner_layout_indices]]
+    }
+
+
+def get_blender_mesh_geometry(mesh_object: bpy.types.Object, linear_modifier: float) -> dict[str, np.ndarray]:
+    """
+    Reads the geometry of the mesh object as arrays in the DNA coordinate system, so they 
+    can be compared against get_dna_mesh_geometry.
+    """
+    mesh = mesh_object.data
+    # Blender is Z-up, DNA is Y-up
+    rotation_matrix = np.array(Matrix.Rotation(math.radians(-90), 3, 'X'))
+
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32) # type: ignore
+    mesh.vertices.foreach_get('co', positions) # type: ignore
+    face_sizes = np.empty(len(mesh.polygons), dtype=np.int32) # type: ignore
+    mesh.polygons.foreach_get('loop_total', face_sizes) # type: ignore
+    corner_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32) # type: ignore
+    mesh.loops.foreach_get('vertex_index', corner_vertex_indices) # type: ignore
+    corner_uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32) # type: ignore
+    mesh.uv_layers.active.data.foreach_get('uv', corner_uvs) # type: ignore
+    corner_normals = np.empty(len(mesh.loops) * 3, dtype=np.float32) # type: ignore
+    mesh.corner_normals.foreach_get('vector', corner_normals) # type: ignore
+
+    return {
+        'positions': (positions.reshape(-1, 3) @ rotation_matrix.T) / linear_modifier,
+        'vertex_position_indices': np.arange(len(mesh.vertices), dtype=np.int64), # type: ignore
+        'face_sizes': face_sizes.astype(np.int64),
+        'corner_position_indices': corner_vertex_indices.astype(np.int64),
+        'corner_uvs': corner_uvs.reshape(-1, 2),
+        'corner_normals': corner_normals.reshape(-1, 3) @ rotation_matrix.T
+    }
+
+
+def get_dna_skin_weights(dna_file_path: Path, mesh_name: str) -> dict[tuple[int, str], float]:
+    """
+    Reads the skin weights of the mesh in the DNA file, keyed by vertex index and joint name. 
+    Zero weights are left out.
+    """
+    from meta_human_dna.dna_io import get_dna_reader
+    reader = get_dna_reader(file_path=dna_file_path, file_format='binary', use_cache=False)
+    mesh_index = [reader.getMeshName(index) for index in range(reader.getMeshCount())].index(mesh_name)
+    joint_names = [reader.getJointName(index) for index in range(reader.getJointCount())]
+
+    skin_weights = {}
+    for vertex_index in range(len(reader.getVertexPositionXs(mesh_index))):
+        for joint_index, weight in zip(
+            reader.getSkinWeightsJointIndices(mesh_index, vertex_index),
+            reader.getSkinWeightsValues(mesh_index, vertex_index)
+        ):
+            if weight > 0:
+                skin_weights[(vertex_index, joint_names[joint_index])] = weight
+    return skin_weights
+
+
+def get_blender_skin_weights(mesh_object: bpy.types.Object) -> dict[tuple[int, str], float]:
+    """
+    Reads the vertex group weights of the mesh object, keyed by vertex index and vertex group 
+    name. Zero weights are left out.
+    """
+    group_names = [vertex_group.name for vertex_group in mesh_object.vertex_groups]
+    skin_weights = {}
+    for vertex in mesh_object.data.vertices: # type: ignore
+        for group in vertex.groups:
+            if group.weight > 0:
+                skin_weights[(vertex.index, group_names[group.group])] = group.weight
+    return skin_weights